@@ -3,3 +3,9 @@ sops -d secrets-vault/c3/"$ENVIRONMENT".enc.env > .env
 
 # generate requirements file to let clevercloud know which packages to install
 uv export --format requirements-txt --no-dev --frozen > requirements.txt
+
+# compile the markdown content once instead of parsing it in every worker at boot
+uv run --frozen --no-dev python manage.py build_content_bundle
+
+# export the search index searched by the browser, among the static files
+uv run --frozen --no-dev python manage.py build_search_index
@@ -3,6 +3,7 @@ import os
 from django.utils.csp import CSP
 from dotenv import load_dotenv
 
+from lacommunaute.utils.csp import inline_script_hashes
 from lacommunaute.utils.enums import Environment
 
 
@@ -59,12 +60,14 @@ INSTALLED_APPS = DJANGO_APPS + LOCAL_APPS + THIRD_PARTIES_APPS
 DJANGO_MIDDLEWARE = [
     "django.middleware.gzip.GZipMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.redirects.middleware.RedirectFallbackMiddleware",
+    "lacommunaute.utils.middleware.RedirectFallbackMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.middleware.csp.ContentSecurityPolicyMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "lacommunaute.utils.middleware.ParkingPageMiddleware",
+    "lacommunaute.utils.middleware.RateLimitMiddleware",
+    "lacommunaute.utils.middleware.PageCacheMiddleware",
 ]
 
 THIRD_PARTIES_MIDDLEWARE = [
@@ -78,6 +81,11 @@ MIDDLEWARE = DJANGO_MIDDLEWARE + THIRD_PARTIES_MIDDLEWARE
 ROOT_URLCONF = "config.urls"
 LOGIN_URL = "/"  # No login page
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -89,14 +97,16 @@ TEMPLATES = [
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
-                "django.template.context_processors.csp",
+                "lacommunaute.utils.context_processors.csp",
                 "django.template.context_processors.media",
                 "lacommunaute.utils.context_processors.expose_settings",
                 "lacommunaute.utils.context_processors.matomo",
+                # Last, overrides the values of the previous ones.
+                "lacommunaute.utils.context_processors.page_cache",
             ],
+            # Compiled templates are cached, see `lacommunaute.utils.templates.warm_up_templates`.
             "loaders": [
-                "django.template.loaders.filesystem.Loader",
-                "django.template.loaders.app_directories.Loader",
+                ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
             ],
         },
     },
@@ -160,15 +170,68 @@ COMPRESS_OFFLINE_CONTEXT = {
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Cache
-# TODO : improve default cache later, with pymemcache or redis
 # https://docs.djangoproject.com/en/4.1/topics/cache/
+# An in-process cache in front of the database cache shared by all processes, see TieredCache.
 CACHES = {
     "default": {
+        "BACKEND": "lacommunaute.utils.cache.TieredCache",
+        "LOCATION": "shared",
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_L1_MAX_ENTRIES", "1000")),
+            "L1_TIMEOUT": int(os.getenv("CACHE_L1_TIMEOUT", "5")),
+            "STALE_TIMEOUT": int(os.getenv("CACHE_STALE_TIMEOUT", "60")),
+        },
+    },
+    "shared": {
         "BACKEND": "django.core.cache.backends.db.DatabaseCache",
         "LOCATION": "cache_table",
+        # Beyond Django's default of 300 entries: the cached pages and their htmx variants, the search
+        # rankings and pages, the responses to crawlers and the rate limits. Expired entries are culled first.
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_SHARED_MAX_ENTRIES", "50000")),
+            "CULL_FREQUENCY": int(os.getenv("CACHE_SHARED_CULL_FREQUENCY", "10")),
+        },
     },
 }
 
+# Content
+# Categories, cards and partners compiled at build time by `build_content_bundle`.
+CONTENT_BUNDLE_PATH = os.getenv("CONTENT_BUNDLE_PATH", os.path.join(ROOT_DIR, "content.bundle"))
+# The documentation and partner pages rendered by `prerender_pages`, served by the front web server.
+PRERENDER_DIR = os.getenv("PRERENDER_DIR", os.path.join(ROOT_DIR, "prerendered"))
+# Identifies the deployed code in the page cache version, set by Clever Cloud to the deployed commit.
+DEPLOY_ID = os.getenv("COMMIT_ID", "")
+# How long the content pages are cached, until the content, the templates or the code change. 0 disables the cache.
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "86400"))
+# Beyond, /sitemap.xml is a sitemap index of the sections, split into pages of SITEMAP_LIMIT URLs.
+SITEMAP_LIMIT = int(os.getenv("SITEMAP_LIMIT", "50000"))
+
+# Search
+# The Postgres backend searches the index refreshed by `rebuild_index`, the memory
+# backend searches an index built by each worker when it loads the content.
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "lacommunaute.search.backends.PostgresSearchBackend")
+# Number of documents selected by a cheap ranking, then reranked using cover density.
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "200"))
+# How much more a match in the title weighs than a match in the content, from 1 (no boost) to 10.
+SEARCH_TITLE_BOOST = float(os.getenv("SEARCH_TITLE_BOOST", "1"))
+# Paginate the search results with a "load more" button instead of numbered pages.
+SEARCH_CURSOR_PAGINATION = os.getenv("SEARCH_CURSOR_PAGINATION", "False") == "True"
+# Search results are cached until the index changes, the timeout only bounds the cache size.
+SEARCH_CACHE_TIMEOUT = int(os.getenv("SEARCH_CACHE_TIMEOUT", "3600"))
+# Maximum duration of each search query, in milliseconds, before falling back to a cheaper one. 0 disables it.
+SEARCH_STATEMENT_TIMEOUT = int(os.getenv("SEARCH_STATEMENT_TIMEOUT", "1000"))
+# Words beyond this number are ignored, long queries are costly and rarely useful.
+SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "10"))
+# Searches allowed per second, and in a burst, for each client IP and for all of them. 0 disables the limit.
+SEARCH_RATE_LIMIT_PER_IP = float(os.getenv("SEARCH_RATE_LIMIT_PER_IP", "1"))
+SEARCH_RATE_LIMIT_PER_IP_BURST = int(os.getenv("SEARCH_RATE_LIMIT_PER_IP_BURST", "20"))
+SEARCH_RATE_LIMIT_GLOBAL = float(os.getenv("SEARCH_RATE_LIMIT_GLOBAL", "20"))
+SEARCH_RATE_LIMIT_GLOBAL_BURST = int(os.getenv("SEARCH_RATE_LIMIT_GLOBAL_BURST", "100"))
+# The cache sharing the rate limits between processes, such as "shared", each process counts on its own when empty.
+SEARCH_RATE_LIMIT_CACHE = os.getenv("SEARCH_RATE_LIMIT_CACHE", "")
+# Number of proxies appending the client IP to X-Forwarded-For, such as the Clever Cloud load balancer.
+SEARCH_RATE_LIMIT_PROXIES = int(os.getenv("SEARCH_RATE_LIMIT_PROXIES", "1"))
+
 COMMU_PROTOCOL = "https"
 COMMU_FQDN = os.getenv("COMMU_FQDN", "communaute.inclusion.gouv.fr")
 
@@ -231,7 +294,6 @@ img_src = [
 ]
 script_src = [
     CSP.SELF,
-    CSP.NONCE,
     "https://cdn.jsdelivr.net/npm/chart.js@4.0.1",
     "https://cdn.jsdelivr.net/npm/jquery@3.6.1/dist/jquery.min.js",
     "https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js",
@@ -259,6 +321,14 @@ if MATOMO_BASE_URL:
         MATOMO_BASE_URL,
     ]
 
+# Our inline scripts are allowed by their hash, or by a nonce in "nonce" mode
+# and for the views decorated with `csp_nonce`. See lacommunaute.utils.csp.
+CSP_MODE = os.getenv("CSP_MODE", "hash")
+if CSP_MODE == "nonce":
+    script_src += [CSP.NONCE]
+else:
+    script_src += inline_script_hashes(TEMPLATES[0]["DIRS"])
+
 SECURE_CSP = {
     "default-src": [
         CSP.SELF,
@@ -21,6 +21,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["localhost", "0.0.0.0", "127.0.0.1", "192.168.0.1"]
 
+# Templates are read from disk on each render to pick up changes.
+TEMPLATES[0]["OPTIONS"]["loaders"] = TEMPLATE_LOADERS  # noqa: F405
+
 # Security.
 # ------------------------------------------------------------------------------
 CSRF_COOKIE_SECURE = False
@@ -21,6 +21,25 @@ DATABASES["default"]["NAME"] = os.getenv("PGDATABASE", "communaute")  # noqa: F4
 DATABASES["default"]["USER"] = os.getenv("PGUSER", "postgres")  # noqa: F405
 DATABASES["default"]["PASSWORD"] = os.getenv("PGPASSWORD", "password")  # noqa: F405
 
+# Cache
+# ------------------------------------------------------------------------------
+# Cleared before each test, see conftest.
+CACHES = {
+    "default": {
+        "BACKEND": "lacommunaute.utils.cache.TieredCache",
+        "LOCATION": "shared",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Search
+# ------------------------------------------------------------------------------
+# Enabled by the tests of the rate limits.
+SEARCH_RATE_LIMIT_PER_IP = 0
+SEARCH_RATE_LIMIT_GLOBAL = 0
+
 # SENDINBLUE
 # ---------------------------------------
 SIB_URL = "http://test.com"
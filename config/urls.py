@@ -1,9 +1,8 @@
 from django.conf import settings
-from django.contrib.flatpages import views
 from django.urls import include, path, re_path
 
 from lacommunaute.documentation import urls as documentation_urls
-from lacommunaute.pages import urls as pages_urls
+from lacommunaute.pages import urls as pages_urls, views as pages_views
 from lacommunaute.partner import urls as partner_urls
 from lacommunaute.search import urls as search_urls
 
@@ -16,7 +15,7 @@ urlpatterns = [
 ]
 
 urlpatterns += [
-    re_path(r"^(?P<url>.*/)$", views.flatpage),
+    re_path(r"^(?P<url>.*/)$", pages_views.flatpage),
 ]
 
 if settings.DEBUG and "debug_toolbar" in settings.INSTALLED_APPS:
@@ -15,3 +15,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.prod")
 
 application = get_wsgi_application()
+
+# Imported once the application is loaded, as it requires the settings and the app registry.
+from lacommunaute.search.backends import get_backend  # noqa: E402
+from lacommunaute.utils.templates import warm_up_templates  # noqa: E402
+
+
+warm_up_templates()
+# Build the in-memory search index now when that backend is selected.
+get_backend()
@@ -1,10 +1,13 @@
 import glob
 import pathlib
+from collections import defaultdict
 
 import frontmatter
 import markdown
 from django.utils.safestring import mark_safe
 
+from lacommunaute.utils import content_bundle
+
 
 CATEGORIES = [
     {
@@ -138,9 +141,12 @@ L’ensemble constitue un point d’entrée unique pour comprendre l’écosyst
     },
 ]
 
-for category in CATEGORIES:
-    if content := category["content"]:
-        category["html"] = mark_safe(markdown.markdown(content, extensions=["nl2br"]))
+
+def parse_categories():
+    for category in CATEGORIES:
+        if content := category["content"]:
+            category["html"] = mark_safe(markdown.markdown(content, extensions=["nl2br"]))
+    return CATEGORIES
 
 
 def parse_cards():
@@ -159,8 +165,59 @@ def parse_cards():
     return {k: v for k, v in sorted(cards.items(), key=lambda item: item[1]["name"])}
 
 
-CARDS = parse_cards()
+def index_content(categories, cards):
+    """
+    Build the lookup tables used by the views once, when the content is loaded,
+    instead of scanning every card on each request.
+    """
+    cards_by_category = defaultdict(list)
+    cards_by_partner = defaultdict(list)
+    cards_by_tag = defaultdict(list)
+    cards_by_category_tag = defaultdict(list)
+    tags_by_category = defaultdict(dict)
+    for card in cards.values():
+        category_slug = card["category_slug"]
+        cards_by_category[category_slug].append(card)
+        if card["partner"]:
+            cards_by_partner[card["partner"]].append(card)
+        for tag in card["tags"] or []:
+            cards_by_tag[tag["slug"]].append(card)
+            cards_by_category_tag[(category_slug, tag["slug"])].append(card)
+            tags_by_category[category_slug].setdefault(tag["slug"], tag)
+
+    def freeze(index):
+        return {key: tuple(values) for key, values in index.items()}
+
+    return {
+        "categories_by_slug": {category["slug"]: category for category in categories},
+        "cards_by_category": freeze(cards_by_category),
+        "cards_by_partner": freeze(cards_by_partner),
+        "cards_by_tag": freeze(cards_by_tag),
+        "cards_by_category_tag": freeze(cards_by_category_tag),
+        "tags_by_category": {key: tuple(tags.values()) for key, tags in tags_by_category.items()},
+    }
+
+
+if bundle := content_bundle.load():
+    CATEGORIES, CARDS = bundle["categories"], bundle["cards"]
+else:
+    CATEGORIES, CARDS = parse_categories(), parse_cards()
+
+INDEXES = index_content(CATEGORIES, CARDS)
+CATEGORIES_BY_SLUG = INDEXES["categories_by_slug"]
+CARDS_BY_CATEGORY = INDEXES["cards_by_category"]
+CARDS_BY_CATEGORY_TAG = INDEXES["cards_by_category_tag"]
+CARDS_BY_PARTNER = INDEXES["cards_by_partner"]
+CARDS_BY_TAG = INDEXES["cards_by_tag"]
+TAGS_BY_CATEGORY = INDEXES["tags_by_category"]
+
+
+def get_cards(category_slug, tag_slug=None):
+    if tag_slug:
+        return CARDS_BY_CATEGORY_TAG.get((category_slug, tag_slug), ())
+    return CARDS_BY_CATEGORY.get(category_slug, ())
 
 
-def get_cards(category_slug):
-    return [card for card in CARDS.values() if card["category_slug"] == category_slug]
+def get_last_modified(cards):
+    """The newest timestamp of the cards, None without cards."""
+    return max((card["timestamp"] for card in cards), default=None)
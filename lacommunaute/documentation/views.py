@@ -1,18 +1,45 @@
 from django.http import Http404
 from django.views.generic import TemplateView
 
-from lacommunaute.documentation.helpers import CARDS, CATEGORIES, get_cards
+from lacommunaute.documentation.helpers import (
+    CARDS,
+    CATEGORIES,
+    CATEGORIES_BY_SLUG,
+    TAGS_BY_CATEGORY,
+    get_cards,
+    get_last_modified,
+)
 from lacommunaute.partner.helpers import PARTNERS
+from lacommunaute.utils.page_cache import conditional_page
 
 
+def category_last_modified(request, slug):
+    return get_last_modified(get_cards(slug, request.GET.get("tag") or None))
+
+
+def card_last_modified(request, slug):
+    if (card := CARDS.get(slug)) is None:
+        return None
+    # The page lists the cards of the category.
+    return get_last_modified(get_cards(card["category_slug"]))
+
+
+@conditional_page()
 class DocumentationIndexView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
     template_name = "documentation/index.html"
 
     def get_context_data(self, **kwargs):
         return {"categories": CATEGORIES}
 
 
+@conditional_page(category_last_modified)
 class DocumentationCategoryView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
+    page_cache_params = ("tag",)
+
     def get_template_names(self):
         if self.request.META.get("HTTP_HX_REQUEST"):
             return ["documentation/partials/cards_list.html"]
@@ -22,43 +49,24 @@ class DocumentationCategoryView(TemplateView):
         super().setup(request, *args, slug, **kwargs)
         self.slug = slug
         try:
-            [self.category] = [category for category in CATEGORIES if category["slug"] == self.slug]
-        except ValueError:
+            self.category = CATEGORIES_BY_SLUG[self.slug]
+        except KeyError:
             raise Http404
 
     def get_context_data(self, **kwargs):
-        tags = []
         tag_filter = self.request.GET.get("tag") or None
-        cards = []
-
-        tag_slug = set()
-        for card in get_cards(self.slug):
-            # Only keep the cards from this category
-            if card["category_slug"] != self.slug:
-                continue
-
-            keep = False
-            for tag in card["tags"] or []:
-                # List all tags from this category
-                if tag["slug"] not in tag_slug:
-                    tag_slug.add(tag["slug"])
-                    tags.append(tag)
-                # filter based on tag
-                if tag_filter and tag["slug"] == tag_filter:
-                    keep = True
-            if tag_filter and keep is False:
-                continue
-            cards.append(card)
-
         return {
             "category": self.category,
-            "cards": cards,
-            "tags": tags,
+            "cards": get_cards(self.slug, tag_filter),
+            "tags": TAGS_BY_CATEGORY.get(self.slug, ()),
             "active_tag_slug": tag_filter,
         }
 
 
+@conditional_page(card_last_modified)
 class DocumentationCardView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
     template_name = "documentation/card.html"
 
     def setup(self, request, *args, slug, **kwargs):
@@ -66,8 +74,8 @@ class DocumentationCardView(TemplateView):
         self.slug = slug
         try:
             self.card = CARDS[self.slug]
-            [self.category] = [category for category in CATEGORIES if category["slug"] == self.card["category_slug"]]
-        except (KeyError, ValueError):
+            self.category = CATEGORIES_BY_SLUG[self.card["category_slug"]]
+        except KeyError:
             raise Http404
 
     def get_context_data(self, **kwargs):
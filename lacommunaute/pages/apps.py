@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+
+class PagesConfig(AppConfig):
+    name = "lacommunaute.pages"
+
+    def ready(self):
+        from django.contrib.flatpages.models import FlatPage
+        from django.contrib.redirects.models import Redirect
+
+        from lacommunaute.pages.flatpages import flatpages_changed
+
+        for model in [FlatPage, Redirect]:
+            post_save.connect(flatpages_changed, sender=model, dispatch_uid=f"{model.__name__}_saved")
+            post_delete.connect(flatpages_changed, sender=model, dispatch_uid=f"{model.__name__}_deleted")
+        m2m_changed.connect(flatpages_changed, sender=FlatPage.sites.through, dispatch_uid="FlatPage_sites_changed")
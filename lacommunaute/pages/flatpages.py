@@ -0,0 +1,77 @@
+"""
+In-memory snapshot of the flatpages and the redirects.
+
+Any URL matching none of our views reaches the flatpage view, and any 404
+the redirect middleware: looking them up in the database makes every
+request of a scanner cost two queries. Each process holds all the flatpages
+and redirects instead, keyed by site and URL, and answers the unknown URLs
+from memory.
+
+The snapshot is reloaded when the version stored in the cache changes:
+saving or deleting a flatpage or a redirect changes it. The version is
+read from the in-process L1 of the TieredCache, without any query: the
+other processes see a change after its L1_TIMEOUT. The values computed
+from the flatpages, such as the sitemap, are cached under a key including it.
+"""
+
+import threading
+import uuid
+
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.redirects.models import Redirect
+from django.core.cache import cache
+from django.db import transaction
+
+
+FLATPAGES_VERSION_KEY = "flatpages:version"
+
+
+def get_flatpages_version():
+    return cache.get_or_set(FLATPAGES_VERSION_KEY, lambda: uuid.uuid4().hex, None)
+
+
+def bump_flatpages_version():
+    cache.set(FLATPAGES_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def flatpages_changed(**kwargs):
+    bump_flatpages_version()
+    # Again once committed: another process may have loaded the snapshot meanwhile.
+    transaction.on_commit(bump_flatpages_version)
+
+
+class Snapshot:
+    def __init__(self, version):
+        self.version = version
+        self.flatpages = {
+            (site.pk, flatpage.url): flatpage
+            for flatpage in FlatPage.objects.prefetch_related("sites")
+            for site in flatpage.sites.all()
+        }
+        self.redirects = {
+            (redirect.site_id, redirect.old_path): redirect.new_path for redirect in Redirect.objects.all()
+        }
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    global _snapshot
+    version = get_flatpages_version()
+    if _snapshot is None or _snapshot.version != version:
+        with _snapshot_lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = Snapshot(version)
+    return _snapshot
+
+
+def get_flatpage(site_id, url):
+    """The flatpage of the site at url, None when missing."""
+    return get_snapshot().flatpages.get((site_id, url))
+
+
+def get_redirect(site_id, old_path):
+    """The new path of the redirect of the site from old_path, "" when gone, None when missing."""
+    return get_snapshot().redirects.get((site_id, old_path))
@@ -1,13 +1,21 @@
+from django.conf import settings
 from django.contrib.flatpages.models import FlatPage
 from django.contrib.sitemaps import Sitemap
 from django.db.models.base import Model
 from django.urls import reverse
 
-from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.documentation.helpers import CARDS, CARDS_BY_PARTNER, CATEGORIES, get_cards, get_last_modified
 from lacommunaute.partner.helpers import PARTNERS
 
 
-class PagesSitemap(Sitemap):
+class ContentSitemap(Sitemap):
+    @property
+    def limit(self):
+        # The sitemaps are split into pages of a sitemap index beyond.
+        return settings.SITEMAP_LIMIT
+
+
+class PagesSitemap(ContentSitemap):
     def items(self):
         return FlatPage.objects.filter(registration_required=False).order_by("title")
 
@@ -18,25 +26,42 @@ class PagesSitemap(Sitemap):
         return "weekly"
 
 
-class DocumentationCategorySitemap(Sitemap):
+class DocumentationCategorySitemap(ContentSitemap):
     def items(self):
         return CATEGORIES
 
     def location(self, obj: Model) -> str:
         return reverse("documentation:category", kwargs={"slug": obj["slug"]})
 
+    def lastmod(self, obj):
+        return get_last_modified(get_cards(obj["slug"]))
 
-class DocumentationCardSitemap(Sitemap):
+
+class DocumentationCardSitemap(ContentSitemap):
     def items(self):
         return list(CARDS.values())
 
     def location(self, obj: Model) -> str:
         return reverse("documentation:card", kwargs={"slug": obj["slug"]})
 
+    def lastmod(self, obj):
+        return obj["timestamp"]
+
 
-class PartnerSitemap(Sitemap):
+class PartnerSitemap(ContentSitemap):
     def items(self):
         return list(PARTNERS.values())
 
     def location(self, obj: Model) -> str:
         return reverse("partner:detail", kwargs={"slug": obj["slug"]})
+
+    def lastmod(self, obj):
+        return get_last_modified(CARDS_BY_PARTNER.get(obj["slug"], ()))
+
+
+SITEMAPS = {
+    "pages": PagesSitemap,
+    "category": DocumentationCategorySitemap,
+    "card": DocumentationCardSitemap,
+    "partner": PartnerSitemap,
+}
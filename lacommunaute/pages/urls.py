@@ -1,17 +1,9 @@
-from django.contrib.sitemaps.views import sitemap
 from django.urls import path
 from django.views.generic.base import TemplateView
 
-from lacommunaute.pages import sitemaps, views
+from lacommunaute.pages import views
 
 
-sitemaps = {
-    "pages": sitemaps.PagesSitemap,
-    "category": sitemaps.DocumentationCategorySitemap,
-    "card": sitemaps.DocumentationCardSitemap,
-    "partner": sitemaps.PartnerSitemap,
-}
-
 app_name = "pages"
 
 urlpatterns = [
@@ -20,5 +12,6 @@ urlpatterns = [
     path("mentions-legales/", views.mentions_legales, name="mentions_legales"),
     path("politique-de-confidentialite/", views.politique_de_confidentialite, name="politique_de_confidentialite"),
     path("robots.txt", TemplateView.as_view(template_name="robots.txt", content_type="text/plain"), name="robots"),
-    path("sitemap.xml", sitemap, {"sitemaps": sitemaps}, name="django.contrib.sitemaps.views.sitemap"),
+    path("sitemap.xml", views.sitemap, name="django.contrib.sitemaps.views.sitemap"),
+    path("sitemap-<str:section>.xml", views.sitemap, name="sitemap_section"),
 ]
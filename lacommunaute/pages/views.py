@@ -1,13 +1,28 @@
+import copy
 import logging
 
+from django.conf import settings
+from django.contrib.flatpages.views import render_flatpage
+from django.contrib.sitemaps import views as sitemaps_views
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponsePermanentRedirect
 from django.shortcuts import render
+from django.views.decorators.http import condition
 from django.views.generic.base import TemplateView
 
+from lacommunaute.pages.flatpages import get_flatpage, get_flatpages_version
+from lacommunaute.pages.sitemaps import SITEMAPS
+from lacommunaute.utils.page_cache import content_version
+
 
 logger = logging.getLogger(__name__)
 
 
 class HomeView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
     template_name = "pages/home.html"
 
 
@@ -21,3 +36,48 @@ def mentions_legales(request):
 
 def politique_de_confidentialite(request):
     return render(request, "pages/politique_de_confidentialite.html")
+
+
+# Read from the snapshot, no need for a transaction.
+@transaction.non_atomic_requests
+def flatpage(request, url):
+    """`django.contrib.flatpages.views.flatpage`, reading the flatpages from their snapshot."""
+    if not url.startswith("/"):
+        url = "/" + url
+    site_id = get_current_site(request).id
+    if (page := get_flatpage(site_id, url)) is None:
+        if not url.endswith("/") and settings.APPEND_SLASH and get_flatpage(site_id, url + "/"):
+            return HttpResponsePermanentRedirect(f"{request.path}/")
+        raise Http404
+    # Shared by the requests, and changed by render_flatpage.
+    return render_flatpage(request, copy.copy(page))
+
+
+def sitemap_etag(request, section=None):
+    return f"{content_version()}-{get_flatpages_version()}"
+
+
+def render_sitemap(request, section):
+    """A sitemap index of the sections once there are more than SITEMAP_LIMIT URLs, paginated by section."""
+    if section is None and sum(sitemap().paginator.count for sitemap in SITEMAPS.values()) > settings.SITEMAP_LIMIT:
+        return sitemaps_views.index(request, SITEMAPS, sitemap_url_name="pages:sitemap_section")
+    return sitemaps_views.sitemap(request, SITEMAPS, section=section)
+
+
+# Read from the cache, no need for a transaction.
+@transaction.non_atomic_requests
+@condition(etag_func=sitemap_etag)
+def sitemap(request, section=None):
+    """The sitemap, rendered once for each version of the content and of the flatpages."""
+    page = request.GET.get("p", "1")
+    key = f"sitemap:{sitemap_etag(request)}:{request.scheme}://{get_current_site(request).domain}:{section}:{page}"
+    if (cached := cache.get(key)) is not None:
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers:
+            response.headers[header] = value
+        return response
+    response = render_sitemap(request, section)
+    response.render()
+    cache.set(key, (response.content, list(response.items())), settings.PAGE_CACHE_TIMEOUT)
+    return response
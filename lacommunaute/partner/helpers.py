@@ -5,6 +5,8 @@ import frontmatter
 import markdown
 from django.utils.safestring import mark_safe
 
+from lacommunaute.utils import content_bundle
+
 
 def parse_partners():
     partners = {}
@@ -19,4 +21,7 @@ def parse_partners():
     return {k: v for k, v in sorted(partners.items(), key=lambda item: item[1]["name"])}
 
 
-PARTNERS = parse_partners()
+if bundle := content_bundle.load():
+    PARTNERS = bundle["partners"]
+else:
+    PARTNERS = parse_partners()
@@ -1,18 +1,29 @@
 from django.http import Http404
 from django.views.generic import TemplateView
 
-from lacommunaute.documentation.helpers import CARDS
+from lacommunaute.documentation.helpers import CARDS_BY_PARTNER, get_last_modified
 from lacommunaute.partner.helpers import PARTNERS
+from lacommunaute.utils.page_cache import conditional_page
 
 
+def partner_last_modified(request, slug):
+    return get_last_modified(CARDS_BY_PARTNER.get(slug, ()))
+
+
+@conditional_page()
 class PartnerListView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
     template_name = "partner/list.html"
 
     def get_context_data(self, **kwargs):
         return {"partners": PARTNERS.values()}
 
 
+@conditional_page(partner_last_modified)
 class PartnerDetailView(TemplateView):
+    # See PageCacheMiddleware.
+    page_cached = True
     template_name = "partner/detail.html"
 
     def setup(self, request, *args, slug, **kwargs):
@@ -24,13 +35,7 @@ class PartnerDetailView(TemplateView):
             raise Http404
 
     def get_context_data(self, **kwargs):
-        cards = []
-
-        for card in CARDS.values():
-            if self.slug == card["partner"]:
-                cards.append(card)
-
         return {
             "partner": self.partner,
-            "cards": cards,
+            "cards": CARDS_BY_PARTNER.get(self.slug, ()),
         }
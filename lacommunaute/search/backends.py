@@ -0,0 +1,271 @@
+import abc
+import bisect
+import itertools
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cache
+
+import snowballstemmer
+from django.conf import settings
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from lacommunaute.search.executor import SearchExecutor, count_categories
+from lacommunaute.search.helpers import get_documents
+from lacommunaute.search.text import FRENCH_STOPWORDS, WORD_RE, is_empty_query
+
+
+def get_backend():
+    """The search backend selected by the SEARCH_BACKEND setting."""
+    return load_backend(settings.SEARCH_BACKEND)
+
+
+@cache
+def load_backend(path):
+    return import_string(path)()
+
+
+class SearchBackend(abc.ABC):
+    """
+    Search the indexed categories and cards.
+    `search()` returns the results for a query, to be paginated by a
+    SearchPaginator or a CursorPage: they provide `count()`, `ranking()`, the
+    (id, rank, category_slug) of every result, `category_counts()`,
+    `capped()`, true when the ranking may leave out matching documents, and
+    `fetch(offset, limit)`. Each result has a title, a category_slug, a
+    card_slug for cards, a rank and a headline.
+    """
+
+    @abc.abstractmethod
+    def search(self, query, category=None):
+        """The results for the query, in the category with that slug if given."""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Search the CommonIndex table, refreshed by `rebuild_index`."""
+
+    def search(self, query, category=None):
+        return SearchExecutor(query, category)
+
+
+@dataclass
+class SearchResult:
+    title: str
+    category_slug: str
+    card_slug: str
+    rank: float
+    headline: str
+
+
+@dataclass
+class Term:
+    # The stems of the words of the term, None for the stop words.
+    stems: list
+    negated: bool = False
+
+
+# A quoted phrase, or a word, optionally negated, as in websearch_to_tsquery.
+QUERY_TERM_RE = re.compile(r'(-?)(?:"([^"]*)"?|([^\s"]+))')
+
+
+class MemorySearchBackend(SearchBackend):
+    """
+    Search an inverted index of the documents held in memory, built when the
+    backend is loaded: no database query is needed.
+
+    The query syntax and the text analysis match the PostgreSQL french
+    configuration, words are stemmed with the same Snowball stemmer and stop
+    words are ignored. Documents are ranked using BM25.
+    """
+
+    # BM25 parameters.
+    k1 = 1.2
+    b = 0.75
+    # Words per headline, as ts_headline MaxWords.
+    headline_words = 35
+
+    def __init__(self, documents=None):
+        self.stemmer = snowballstemmer.stemmer("french")
+        # The stemmer is slow, the vocabulary is small.
+        self.stems = {}
+        self.documents = []
+        # stem -> {document index -> positions}, for titles and contents.
+        self.title_postings = defaultdict(dict)
+        self.content_postings = defaultdict(dict)
+        self.lengths = []
+        self.documents_by_category = defaultdict(set)
+        for document in get_documents() if documents is None else documents:
+            self.add(document)
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def analyze(self, text):
+        """The stem of each word of text, None for the stop words."""
+        stems = []
+        for word in WORD_RE.findall(text.casefold()):
+            if word in FRENCH_STOPWORDS:
+                stems.append(None)
+            elif (stem := self.stems.get(word)) is not None:
+                stems.append(stem)
+            else:
+                stems.append(self.stems.setdefault(word, self.stemmer.stemWord(word)))
+        return stems
+
+    def add(self, document):
+        index = len(self.documents)
+        self.documents.append(document)
+        self.documents_by_category[document["category_slug"]].add(index)
+        self.add_postings(self.title_postings, index, self.analyze(document["title"]))
+        stems = self.analyze(document["content"])
+        self.add_postings(self.content_postings, index, stems)
+        self.lengths.append(sum(stem is not None for stem in stems))
+
+    @staticmethod
+    def add_postings(postings, index, stems):
+        for position, stem in enumerate(stems):
+            if stem is not None:
+                postings[stem].setdefault(index, []).append(position)
+
+    def parse(self, query):
+        """
+        Split the query in terms, websearch_to_tsquery style: words and quoted
+        phrases must all match, unless separated by `or`, and terms prefixed
+        with `-` must not match. Return a list of alternatives for each term.
+        """
+        clauses = []
+        alternative = False
+        for negated, phrase, word in QUERY_TERM_RE.findall(query):
+            text = phrase if phrase else word
+            if not negated and not phrase and text.casefold() == "or":
+                alternative = bool(clauses)
+                continue
+            stems = self.analyze(text)
+            if not any(stems):
+                continue
+            term = Term(stems, negated=bool(negated))
+            if alternative and not clauses[-1][0].negated and not term.negated:
+                clauses[-1].append(term)
+            else:
+                clauses.append([term])
+            alternative = False
+        return clauses
+
+    def matching(self, term):
+        """The documents containing the words of the term, in sequence for a phrase."""
+        postings = self.content_postings
+        words = [(offset, stem) for offset, stem in enumerate(term.stems) if stem is not None]
+        first_offset, first_stem = words[0]
+        matches = set()
+        for index, positions in postings.get(first_stem, {}).items():
+            starts = {position - first_offset for position in positions}
+            for offset, stem in words[1:]:
+                starts &= {position - offset for position in postings.get(stem, {}).get(index, ())}
+            if starts:
+                matches.add(index)
+        return matches
+
+    def search(self, query, category=None):
+        if is_empty_query(query or ""):
+            return MemorySearchResults(self, [], [])
+        clauses = self.parse(query)
+        if not clauses:
+            return MemorySearchResults(self, [], [])
+
+        matched = None
+        excluded = set()
+        for clause in clauses:
+            indexes = set()
+            for term in clause:
+                indexes |= self.matching(term)
+            if clause[0].negated:
+                excluded |= indexes
+            else:
+                matched = indexes if matched is None else matched & indexes
+        if matched is None:
+            # Only negated terms, PostgreSQL matches everything else.
+            matched = set(range(len(self.documents)))
+        matched -= excluded
+        if category:
+            matched &= self.documents_by_category.get(category, set())
+
+        stems = {stem for clause in clauses for term in clause if not term.negated for stem in term.stems if stem}
+        ranking = sorted(
+            ((index, self.score(index, stems), self.documents[index]["category_slug"]) for index in matched),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return MemorySearchResults(self, ranking, stems)
+
+    def score(self, index, stems):
+        length_norm = 1 - self.b + self.b * self.lengths[index] / self.average_length
+        score = 0
+        for stem in stems:
+            postings = self.content_postings.get(stem, {})
+            frequency = len(postings.get(index, ())) + settings.SEARCH_TITLE_BOOST * len(
+                self.title_postings.get(stem, {}).get(index, ())
+            )
+            if not frequency:
+                continue
+            idf = math.log(1 + (len(self.documents) - len(postings) + 0.5) / (len(postings) + 0.5))
+            score += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return score
+
+    def headline(self, index, stems):
+        """
+        The excerpt of the content with the most matching words, which are
+        highlighted like the PostgreSQL headlines.
+        """
+        content = self.documents[index]["content"]
+        hits = sorted(position for stem in stems for position in self.content_postings.get(stem, {}).get(index, ()))
+        size = self.headline_words
+        # Start the excerpt at the hit followed by the most hits.
+        best = max(range(len(hits)), key=lambda i: bisect.bisect_left(hits, hits[i] + size) - i, default=None)
+        first = 0 if best is None else hits[best]
+        words = itertools.islice(WORD_RE.finditer(content), first, first + size)
+        hits = set(hits)
+
+        parts = []
+        position = None
+        for offset, word in enumerate(words, start=first):
+            if position is not None:
+                parts.append(escape(content[position : word.start()]))
+            parts.append(
+                f'<span class="highlighted">{escape(word.group())}</span>' if offset in hits else escape(word.group())
+            )
+            position = word.end()
+        return "".join(parts)
+
+
+class MemorySearchResults:
+    def __init__(self, backend, ranking, stems):
+        self.backend = backend
+        self._ranking = ranking
+        self.stems = stems
+
+    def ranking(self):
+        """The (index, score, category_slug) of the matching documents, best first."""
+        return self._ranking
+
+    def count(self):
+        return len(self._ranking)
+
+    def capped(self):
+        return False
+
+    def category_counts(self):
+        return count_categories(self._ranking)
+
+    def fetch(self, offset, limit):
+        results = []
+        for index, rank, _category_slug in self._ranking[offset : offset + limit]:
+            document = self.backend.documents[index]
+            results.append(
+                SearchResult(
+                    title=document["title"],
+                    category_slug=document["category_slug"],
+                    card_slug=document["card_slug"],
+                    rank=rank,
+                    headline=self.backend.headline(index, self.stems),
+                )
+            )
+        return results
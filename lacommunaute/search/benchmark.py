@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from django.test import RequestFactory
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.search.views import SearchView
+
+
+QUERIES = {
+    "word": ["emploi", "formation", "handicap", "mobilité", "logement", "IAE"],
+    "phrase": ['"retour à l’emploi"', '"freins périphériques"', '"insertion professionnelle"', '"contrat aidé"'],
+    "websearch": ["emploi -handicap", "formation or apprentissage", '"projet professionnel" -jeunes', "aide mobilité"],
+    "no match": ["anticonstitutionnellement", "xylophone", '"emploi anticonstitutionnellement"'],
+}
+
+
+class TextGenerator:
+    """
+    Generate French text with the vocabulary of the shipped cards: each word
+    is drawn among the words following the previous one in the cards.
+    """
+
+    def __init__(self, texts, rng):
+        self.rng = rng
+        self.following = defaultdict(list)
+        self.starts = []
+        for text in texts:
+            words = text.split()
+            if not words:
+                continue
+            self.starts.append(words[0])
+            for word, next_word in zip(words, words[1:]):
+                self.following[word].append(next_word)
+
+    def generate(self, length):
+        word = self.rng.choice(self.starts)
+        words = [word]
+        while len(words) < length:
+            following = self.following.get(word)
+            word = self.rng.choice(following) if following else self.rng.choice(self.starts)
+            words.append(word)
+        return " ".join(words)
+
+
+def generate_cards(count, seed=0):
+    """
+    Synthetic cards, in the same shape as CARDS. Their lengths and their
+    vocabulary follow the shipped cards.
+    """
+    rng = random.Random(seed)
+    models = list(CARDS.values())
+    titles = TextGenerator([card["name"] for card in models], rng)
+    descriptions = TextGenerator([card["description"] for card in models], rng)
+    contents = TextGenerator([card["content"] for card in models], rng)
+    category_slugs = [category["slug"] for category in CATEGORIES]
+
+    cards = {}
+    for number in range(count):
+        model = rng.choice(models)
+        slug = f"fiche-synthetique-{number}"
+        content = contents.generate(max(len(model["content"].split()), 1))
+        cards[slug] = {
+            "name": titles.generate(max(len(model["name"].split()), 1)),
+            "description": descriptions.generate(max(len(model["description"].split()), 1)),
+            "image": model["image"],
+            "tags": model["tags"],
+            "partner": None,
+            "timestamp": model["timestamp"],
+            "content": content,
+            "html": mark_safe(f"<p>{escape(content)}</p>"),
+            "slug": slug,
+            "category_slug": rng.choice(category_slugs),
+        }
+    return cards
+
+
+def percentiles(durations):
+    """Latency percentiles, in milliseconds."""
+    durations = sorted(duration * 1000 for duration in durations)
+    quantiles = statistics.quantiles(durations, n=100, method="inclusive") if len(durations) > 1 else durations * 99
+    return {
+        "p50": round(quantiles[49], 3),
+        "p90": round(quantiles[89], 3),
+        "p99": round(quantiles[98], 3),
+        "max": round(durations[-1], 3),
+        "count": len(durations),
+    }
+
+
+def time_search(query, backend=None):
+    """Time a SearchView request, up to the rendered response."""
+    view = SearchView.as_view(backend=backend)
+    request = RequestFactory().get("/search/", {"q": query})
+    start = time.perf_counter()
+    response = view(request)
+    response.render()
+    duration = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"Search for {query!r} failed with status {response.status_code}")
+    return duration
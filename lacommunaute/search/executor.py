@@ -0,0 +1,302 @@
+import base64
+import hashlib
+import json
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import OperationalError, connection, transaction
+from django.db.models import F, Value
+from psycopg import errors
+
+from lacommunaute.search.models import CommonIndex, IndexVersion
+from lacommunaute.search.text import is_empty_query, normalize_query
+from lacommunaute.utils.cache import get_or_compute
+
+
+logger = logging.getLogger(__name__)
+
+GENERATION_CACHE_KEY = "search:generation"
+# Degraded results are retried soon, the database may only have been busy.
+DEGRADED_CACHE_TIMEOUT = 60
+
+
+def get_generation():
+    """The generation of the index, bumped by `rebuild_index` when the indexed documents change."""
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        generation = IndexVersion.objects.filter(pk=1).values_list("generation", flat=True).first() or 0
+        # Short-lived, `rebuild_index` may be bumping it concurrently.
+        cache.set(GENERATION_CACHE_KEY, generation, 60)
+    return generation
+
+
+def set_generation(generation):
+    cache.set(GENERATION_CACHE_KEY, generation, None)
+
+
+class StatementTimeout(Exception):
+    pass
+
+
+def run_with_timeout(compute):
+    """
+    Run the queries of compute under SEARCH_STATEMENT_TIMEOUT, in a savepoint
+    rolled back afterwards to restore the timeout: the queries only read.
+    Raise StatementTimeout when Postgres cancels one of them.
+    """
+    if not settings.SEARCH_STATEMENT_TIMEOUT:
+        return compute()
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)", [f"{settings.SEARCH_STATEMENT_TIMEOUT}ms"]
+            )
+            value = compute()
+            transaction.set_rollback(True)
+            return value
+    except OperationalError as e:
+        if isinstance(e.__cause__, errors.QueryCanceled):
+            raise StatementTimeout from e
+        raise
+
+
+def count_categories(ranking):
+    """The number of matching documents of each category, most matches first."""
+    return Counter(category_slug for _pk, _rank, category_slug in ranking).most_common()
+
+
+class SearchExecutor:
+    """
+    Run a search in two phases:
+    1. select the best candidates with a cheap ranking, rerank them using
+       cover density, and fetch their ids in a single query;
+    2. compute the headlines, the most expensive part of the search, only for
+       the documents of the requested page.
+
+    Both are cached for the index generation. Queries which can't match
+    anything don't reach the database.
+
+    Each phase runs under SEARCH_STATEMENT_TIMEOUT. On timeout, the search
+    degrades to ranking title matches only, then to no results, and the
+    headlines are left out. Degraded results are cached briefly.
+    """
+
+    def __init__(self, query, category=None):
+        self.query = normalize_query(query or "")
+        self.category = category
+        self._ranking = None
+        self.degraded = False
+
+    @property
+    def search_query(self):
+        return SearchQuery(self.query, config="french", search_type="websearch")
+
+    @property
+    def weights(self):
+        # Weights of the D, C, B (content) and A (title) labels.
+        return [0.1, 0.1, 0.1, min(0.1 * settings.SEARCH_TITLE_BOOST, 1)]
+
+    def cache_key(self, *parts):
+        query_hash = hashlib.sha256(self.query.encode()).hexdigest()
+        return ":".join(["search", str(get_generation()), query_hash, self.category or "", *map(str, parts)])
+
+    def candidates(self):
+        """
+        The best matches according to ts_rank, cheap to compute. The GIN index
+        finds the matching documents, the unique constraint index those of the
+        category when the search is scoped.
+        """
+        documents = CommonIndex.objects.filter(content_ts=self.search_query)
+        if self.category:
+            documents = documents.filter(category_slug=self.category)
+        return (
+            documents.annotate(candidate_rank=SearchRank(F("content_ts"), self.search_query, weights=self.weights))
+            .order_by("-candidate_rank", "pk")
+            .values("pk")[: settings.SEARCH_CANDIDATES]
+        )
+
+    def matches(self):
+        return (
+            # Only rerank the candidates using cover density, which is costlier.
+            CommonIndex.objects.filter(pk__in=self.candidates())
+            .annotate(rank=SearchRank(F("content_ts"), self.search_query, weights=self.weights, cover_density=True))
+            # Arbitrary threshold. From running a couple searches, good results
+            # are above 1.0, standard results are above 0.2 and OK results are
+            # around 0.1. Take a generous margin, and exclude irrelevant
+            # results.
+            .filter(rank__gte=0.01)
+        )
+
+    def title_matches(self):
+        """The documents matching in their title, without reranking, when `matches()` timed out."""
+        documents = CommonIndex.objects.filter(content_ts=self.search_query)
+        if self.category:
+            documents = documents.filter(category_slug=self.category)
+        return (
+            documents.annotate(title_ts=SearchVector("title", config="french"))
+            .filter(title_ts=self.search_query)
+            .annotate(rank=SearchRank(F("title_ts"), self.search_query))
+            .order_by("-rank", "pk")
+        )
+
+    def degrade(self, message):
+        self.degraded = True
+        logger.warning(message, {"query": self.query, "category": self.category})
+
+    def rank(self):
+        try:
+            return run_with_timeout(
+                lambda: list(self.matches().order_by("-rank", "pk").values_list("pk", "rank", "category_slug"))
+            )
+        except StatementTimeout:
+            self.degrade("Search ranking timed out for %(query)r in %(category)r, ranking title matches")
+        try:
+            return run_with_timeout(
+                lambda: list(
+                    self.title_matches().values_list("pk", "rank", "category_slug")[: settings.SEARCH_CANDIDATES]
+                )
+            )
+        except StatementTimeout:
+            self.degrade("Search title ranking timed out for %(query)r in %(category)r, no results")
+            return []
+
+    def ranking(self):
+        """The (id, rank, category_slug) of the matching documents, best first."""
+        if self._ranking is None:
+            if is_empty_query(self.query):
+                self._ranking = []
+            else:
+                key = self.cache_key("ranking")
+                self._ranking = get_or_compute(key, self.rank, settings.SEARCH_CACHE_TIMEOUT)
+                if self.degraded:
+                    cache.set(key, self._ranking, DEGRADED_CACHE_TIMEOUT)
+        return self._ranking
+
+    def count(self):
+        return len(self.ranking())
+
+    def capped(self):
+        """Whether the ranking is limited to the SEARCH_CANDIDATES best candidates: more documents may match."""
+        return self.count() >= settings.SEARCH_CANDIDATES
+
+    def category_counts(self):
+        return count_categories(self.ranking())
+
+    def fetch(self, offset, limit):
+        ranked = self.ranking()[offset : offset + limit]
+        if not ranked:
+            return []
+        # Keyed by the ranked documents: a degraded ranking has pages of its own.
+        key = self.cache_key("page", hashlib.sha256(repr(ranked).encode()).hexdigest())
+        degraded = self.degraded
+        results = get_or_compute(key, lambda: self.headlines(ranked), settings.SEARCH_CACHE_TIMEOUT)
+        if self.degraded and not degraded:
+            cache.set(key, results, DEGRADED_CACHE_TIMEOUT)
+        return results
+
+    def headlines(self, ranked):
+        """
+        The ranked documents with their headline. Those removed by
+        `rebuild_index` since the ranking was computed are left out: the
+        pages may have fewer results than requested.
+        """
+        documents = CommonIndex.objects.filter(pk__in=[pk for pk, _rank, _category_slug in ranked]).only(
+            "title", "category_slug", "card_slug"
+        )
+        try:
+            indexes = run_with_timeout(lambda: self.with_headlines(documents).in_bulk())
+        except StatementTimeout:
+            self.degrade("Search headlines timed out for %(query)r in %(category)r, leaving them out")
+            indexes = documents.annotate(headline=Value("")).in_bulk()
+        results = []
+        for pk, rank, _category_slug in ranked:
+            if (index := indexes.get(pk)) is None:
+                continue
+            index.rank = rank
+            results.append(index)
+        return results
+
+    def with_headlines(self, documents):
+        return documents.annotate(
+            headline=SearchHeadline(
+                # Don’t highlight matches in title, it already stands out.
+                "content",
+                self.search_query,
+                config="french",
+                fragment_delimiter="…",
+                start_sel='<span class="highlighted">',
+                stop_sel="</span>",
+            )
+        )
+
+
+class SearchPaginator(Paginator):
+    """
+    Fetch the page before counting: the count comes with the ranking of the
+    documents, instead of a separate COUNT query.
+    """
+
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        object_list = self.object_list.fetch((number - 1) * self.per_page, self.per_page)
+        number = self.validate_number(number)
+        return self._get_page(object_list, number, self)
+
+
+def encode_cursor(pk, rank):
+    return base64.urlsafe_b64encode(json.dumps([rank, str(pk)]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the (pk, rank) of the cursor, raise ValueError if it is invalid."""
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(rank, (int, float)) or not isinstance(pk, str):
+        raise ValueError("Invalid cursor")
+    return pk, rank
+
+
+class CursorPage:
+    """
+    The results following a cursor, an opaque (rank, id) of the last result
+    shown, for "load more" pagination. The total is capped to
+    SEARCH_CANDIDATES, the number of results Postgres ranks.
+    """
+
+    def __init__(self, results, cursor, per_page):
+        ranking = results.ranking()
+        offset = self.offset_after(ranking, cursor) if cursor else 0
+        self.object_list = results.fetch(offset, per_page)
+        self.count = min(len(ranking), settings.SEARCH_CANDIDATES)
+        self.capped = len(ranking) >= settings.SEARCH_CANDIDATES
+        if offset + per_page < len(ranking):
+            pk, rank, _category_slug = ranking[offset + per_page - 1]
+            self.next_cursor = encode_cursor(pk, rank)
+        else:
+            self.next_cursor = None
+
+    @staticmethod
+    def offset_after(ranking, cursor):
+        """
+        The offset of the result following the cursor. When the ranking has
+        changed and the cursor result is gone, resume at the first result
+        ranked below it.
+        """
+        cursor_pk, cursor_rank = decode_cursor(cursor)
+        for offset, (pk, rank, _category_slug) in enumerate(ranking):
+            if str(pk) == cursor_pk:
+                return offset + 1
+            if rank < cursor_rank:
+                return offset
+        return len(ranking)
@@ -1,6 +1,9 @@
 from django import forms
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
+from lacommunaute.documentation.helpers import CATEGORIES
+
 
 class SearchForm(forms.Form):
     q = forms.CharField(
@@ -11,6 +14,17 @@ class SearchForm(forms.Form):
             attrs={
                 "placeholder": _("Keywords or phrase"),
                 "type": "search",
+                "autocomplete": "off",
+                # Suggest categories, cards and partners while typing.
+                "hx-get": reverse_lazy("search:suggestions"),
+                "hx-trigger": "input changed delay:200ms, search",
+                "hx-target": "#search_suggestions",
             }
         ),
     )
+    # Search in a single category, set by the search box of the category pages.
+    category = forms.ChoiceField(
+        required=False,
+        choices=[(category["slug"], category["name"]) for category in CATEGORIES],
+        widget=forms.HiddenInput,
+    )
@@ -0,0 +1,152 @@
+import hashlib
+import itertools
+from functools import partial
+
+from django.db import connection, transaction
+
+from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.search.executor import set_generation
+from lacommunaute.search.models import CommonIndex, IndexVersion
+
+
+def hash_document(title, content):
+    return hashlib.sha256(f"{title}\0{content}".encode()).hexdigest()
+
+
+def get_documents(categories=None, cards=None):
+    """
+    Yield the documents to index: every category and every card, with the
+    slug of its category. A document is identified by its (category_slug,
+    card_slug) pair, card_slug is empty for categories.
+    """
+    categories = CATEGORIES if categories is None else categories
+    cards = CARDS if cards is None else cards
+    for category in categories:
+        content = "\n".join([category["name"], category["description"], category["content"]])
+        yield {
+            "category_slug": category["slug"],
+            "card_slug": "",
+            "title": category["name"],
+            "content": content,
+            "content_hash": hash_document(category["name"], content),
+        }
+
+    for card in cards.values():
+        content = "\n".join([card["name"], card["description"], card["content"]])
+        yield {
+            "category_slug": card["category_slug"],
+            "card_slug": card["slug"],
+            "title": card["name"],
+            "content": content,
+            "content_hash": hash_document(card["name"], content),
+        }
+
+
+class Fingerprint:
+    """
+    Fingerprint of the indexed documents, computed while they are streamed:
+    it doesn't depend on their order.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, document):
+        key = f"{document['category_slug']}\0{document['card_slug']}\0{document['content_hash']}"
+        self.value = (self.value + int.from_bytes(hashlib.sha256(key.encode()).digest())) % 2**256
+
+    def hexdigest(self):
+        return f"{self.value:064x}"
+
+
+# Documents are streamed to this table, then merged into the index.
+STAGING_TABLE = "search_commonindex_staging"
+STAGING_COLUMNS = ["category_slug", "card_slug", "title", "content", "content_hash"]
+
+
+def refresh_index(get_documents, batch_size=1000):
+    """
+    Bring the index up to date with the documents returned by get_documents,
+    in a single transaction. Return the number of created or updated
+    documents and the number of removed documents, None when the index was
+    already up to date.
+
+    The documents, which may be a generator, are streamed a first time to
+    compute their fingerprint: nothing is written when it didn't change.
+    Otherwise, they are streamed again by batches with COPY to a staging
+    table, then merged into the index with set-based statements: the memory
+    used depends on the batch size, not on the number of documents. Only the
+    keys of the unchanged documents are copied. When a document is streamed
+    several times, the last one is indexed.
+    """
+    table = connection.ops.quote_name(CommonIndex._meta.db_table)
+    columns = ", ".join(STAGING_COLUMNS)
+    fingerprint = Fingerprint()
+    for document in get_documents():
+        fingerprint.update(document)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Lock the version row: concurrent runs are serialized.
+        version, _ = IndexVersion.objects.select_for_update().get_or_create(pk=1)
+        if version.fingerprint == fingerprint.hexdigest():
+            return None
+
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        # Numbers the staged rows in the order they are copied.
+        cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN position bigint GENERATED ALWAYS AS IDENTITY")
+        for batch in itertools.batched(get_documents(), batch_size):
+            cursor.execute(
+                f"""
+                SELECT category_slug, card_slug, content_hash FROM {table}
+                WHERE (category_slug, card_slug) IN (SELECT * FROM unnest(%s::varchar[], %s::varchar[]))
+                """,
+                [[document["category_slug"] for document in batch], [document["card_slug"] for document in batch]],
+            )
+            indexed = {(category_slug, card_slug): content_hash for category_slug, card_slug, content_hash in cursor}
+            with cursor.copy(f"COPY {STAGING_TABLE} ({columns}) FROM STDIN") as copy:
+                for document in batch:
+                    if indexed.get((document["category_slug"], document["card_slug"])) == document["content_hash"]:
+                        copy.write_row(
+                            [document["category_slug"], document["card_slug"], None, None, document["content_hash"]]
+                        )
+                    else:
+                        copy.write_row([document[column] for column in STAGING_COLUMNS])
+
+        cursor.execute(
+            f"""
+            DELETE FROM {table} AS indexed
+            WHERE NOT EXISTS (
+                SELECT FROM {STAGING_TABLE} AS staged
+                WHERE staged.category_slug = indexed.category_slug AND staged.card_slug = indexed.card_slug
+            )
+            """
+        )
+        removed = cursor.rowcount
+        # The search vectors of the inserted and updated rows are generated by this statement.
+        # Unchanged documents, staged without their title and content, are skipped. A row can't be
+        # inserted or updated twice by the statement: only the last staged row of each key is kept.
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (id, {columns})
+            SELECT gen_random_uuid(), {", ".join(f"staged.{column}" for column in STAGING_COLUMNS)}
+            FROM (
+                SELECT DISTINCT ON (category_slug, card_slug) * FROM {STAGING_TABLE}
+                ORDER BY category_slug, card_slug, position DESC
+            ) AS staged
+            LEFT JOIN {table} AS indexed USING (category_slug, card_slug)
+            WHERE indexed.content_hash IS DISTINCT FROM staged.content_hash
+            ON CONFLICT (category_slug, card_slug) DO UPDATE
+            SET title = EXCLUDED.title, content = EXCLUDED.content, content_hash = EXCLUDED.content_hash
+            """
+        )
+        changed = cursor.rowcount
+        cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+        version.fingerprint = fingerprint.hexdigest()
+        version.generation += 1
+        version.save()
+        transaction.on_commit(partial(set_generation, version.generation))
+
+    return changed, removed
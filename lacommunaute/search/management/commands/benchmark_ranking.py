@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.contrib.postgres.search import SearchRank
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from lacommunaute.search.executor import SearchExecutor
+from lacommunaute.search.models import CommonIndex
+
+
+DEFAULT_QUERIES = [
+    "emploi",
+    "insertion professionnelle",
+    "contrat",
+    "IAE",
+    "handicap",
+    "aides à la mobilité",
+    '"freins périphériques"',
+    "formation -cip",
+]
+
+
+def single_stage_ids(executor, limit):
+    """The ranking before candidates selection: every match is ranked using cover density."""
+    queryset = (
+        CommonIndex.objects.filter(content_ts=executor.search_query)
+        .annotate(
+            rank=SearchRank(F("content_ts"), executor.search_query, weights=executor.weights, cover_density=True)
+        )
+        .filter(rank__gte=0.01)
+        .order_by("-rank", "pk")
+    )
+    return list(queryset.values_list("pk", flat=True)[:limit])
+
+
+def reranked_ids(executor, limit):
+    return list(executor.matches().order_by("-rank", "pk").values_list("pk", flat=True)[:limit])
+
+
+def timed(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    return result, statistics.median(durations) * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare the result order and latency of the reranked search against a single-stage ranking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--limit", type=int, default=10, help="Number of results to compare")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query, the median duration is reported")
+
+    def handle(self, *args, queries, limit, repeat, **kwargs):
+        self.stdout.write(f"{CommonIndex.objects.count()} indexed documents, comparing the top {limit} results.")
+        self.stdout.write(f"{'query':<30} {'single (ms)':>12} {'reranked (ms)':>14} {'overlap':>8} {'same order':>11}")
+        for query in queries:
+            executor = SearchExecutor(query)
+            expected, single_duration = timed(lambda: single_stage_ids(executor, limit), repeat)
+            actual, reranked_duration = timed(lambda: reranked_ids(executor, limit), repeat)
+            overlap = len(set(expected) & set(actual)) / len(expected) if expected else 1
+            self.stdout.write(
+                f"{query[:30]:<30} {single_duration:>12.2f} {reranked_duration:>14.2f} {overlap:>8.0%} "
+                f"{'yes' if expected == actual else 'no':>11}"
+            )
@@ -0,0 +1,91 @@
+import json
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from lacommunaute.search.backends import MemorySearchBackend, PostgresSearchBackend
+from lacommunaute.search.benchmark import QUERIES, generate_cards, percentiles, time_search
+from lacommunaute.search.helpers import get_documents, refresh_index
+
+
+# A private cache: the timings don't depend on the shared cache, which isn't polluted either.
+BENCHMARK_CACHES = {
+    "default": {"BACKEND": "lacommunaute.utils.cache.TieredCache", "LOCATION": "benchmark"},
+    "benchmark": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"},
+}
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return round(time.perf_counter() - start, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the indexing duration and the search latency on synthetic cards, and output the results as JSON. "
+        "Nothing is written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--repeat", type=int, default=10, help="Cached runs per query")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic cards")
+        parser.add_argument("--output", help="Write the results to this file instead of the standard output")
+
+    def handle(self, *args, documents, repeat, seed, output, **kwargs):
+        results = {
+            "seed": seed,
+            "repeat": repeat,
+            "queries": QUERIES,
+            "runs": [self.run(count, repeat, seed) for count in documents],
+        }
+        if output:
+            with open(output, "w") as f:
+                json.dump(results, f, indent=2)
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    def run(self, count, repeat, seed):
+        cards = generate_cards(count, seed)
+        # 1% of the cards change between two runs of rebuild_index.
+        changed = dict(cards)
+        for slug in list(cards)[:: max(count // 100, 1)]:
+            changed[slug] = {**cards[slug], "description": f"{cards[slug]['description']} (mise à jour)"}
+
+        with override_settings(CACHES=BENCHMARK_CACHES), transaction.atomic():
+            rebuild_index = {
+                "full": timed(lambda: refresh_index(partial(get_documents, cards=cards))),
+                "unchanged": timed(lambda: refresh_index(partial(get_documents, cards=cards))),
+                "incremental": timed(lambda: refresh_index(partial(get_documents, cards=changed))),
+            }
+            start = time.perf_counter()
+            memory_backend = MemorySearchBackend(get_documents(cards=changed))
+            memory_index = round(time.perf_counter() - start, 3)
+            search = {
+                "postgres": self.time_queries(PostgresSearchBackend(), repeat),
+                "memory": self.time_queries(memory_backend, repeat),
+            }
+            transaction.set_rollback(True)
+
+        return {
+            "documents": count,
+            "rebuild_index_seconds": rebuild_index,
+            "memory_index_seconds": memory_index,
+            "search_latency_ms": search,
+        }
+
+    def time_queries(self, backend, repeat):
+        latencies = {}
+        for kind, queries in QUERIES.items():
+            cold, warm = [], []
+            for query in queries:
+                cache.clear()
+                cold.append(time_search(query, backend))
+                warm.extend(time_search(query, backend) for _ in range(repeat))
+            latencies[kind] = {"cold": percentiles(cold), "warm": percentiles(warm)}
+        return latencies
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from lacommunaute.search.helpers import get_documents
+from lacommunaute.search.static_index import build_static_index, static_index_directory, write_static_index
+
+
+class Command(BaseCommand):
+    help = "Export the static search index, searched by the browser"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", help="Directory of the index, among the static files by default")
+
+    def handle(self, *args, output_dir, **kwargs):
+        output_dir = output_dir or static_index_directory()
+        index = build_static_index(get_documents())
+        filename = write_static_index(index, output_dir)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Search index written to {output_dir}/{filename}: {len(index['documents'])} documents, "
+                f"{len(index['words'])} words."
+            )
+        )
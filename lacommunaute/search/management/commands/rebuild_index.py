@@ -1,47 +1,16 @@
-from django.contrib.postgres.search import SearchVector
 from django.core.management.base import BaseCommand
 
-from lacommunaute.documentation.helpers import CARDS, CATEGORIES
-from lacommunaute.search.models import CommonIndex
+from lacommunaute.search.helpers import get_documents, refresh_index
 
 
 class Command(BaseCommand):
     help = "Index all categories and cards"
 
     def handle(self, *args, **kwargs):
-        indexes = []
-        for category in CATEGORIES:
-            content = "\n".join(
-                [
-                    category["name"],
-                    category["description"],
-                    category["content"],
-                ]
-            )
-            indexes.append(
-                CommonIndex(
-                    title=category["name"],
-                    content=content,
-                    category_slug=category["slug"],
-                )
-            )
+        refreshed = refresh_index(get_documents)
+        if refreshed is None:
+            self.stdout.write(self.style.SUCCESS("Indices already up to date."))
+            return
 
-        for card in CARDS.values():
-            content = "\n".join(
-                [
-                    card["name"],
-                    card["description"],
-                    card["content"],
-                ]
-            )
-            indexes.append(
-                CommonIndex(
-                    title=card["name"],
-                    content=content,
-                    card_slug=card["slug"],
-                )
-            )
-        CommonIndex.objects.all().delete()
-        CommonIndex.objects.bulk_create(indexes)
-        CommonIndex.objects.update(content_ts=SearchVector("content"))
-        self.stdout.write(self.style.SUCCESS("Indices refreshed!"))
+        changed, removed = refreshed
+        self.stdout.write(self.style.SUCCESS(f"Indices refreshed! {changed} created or updated, {removed} removed."))
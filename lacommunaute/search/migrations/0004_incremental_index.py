@@ -0,0 +1,30 @@
+# Generated by Django 6.0.7 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0003_reboot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("fingerprint", models.CharField(editable=False)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="commonindex",
+            name="content_hash",
+            field=models.CharField(default="", editable=False),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name="commonindex",
+            constraint=models.UniqueConstraint(fields=("category_slug", "card_slug"), name="unique_indexed_document"),
+        ),
+    ]
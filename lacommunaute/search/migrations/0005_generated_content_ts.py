@@ -0,0 +1,35 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0004_incremental_index"),
+    ]
+
+    operations = [
+        # A regular column can't be altered into a generated one.
+        migrations.RemoveField(
+            model_name="commonindex",
+            name="content_ts",
+        ),
+        migrations.AddField(
+            model_name="commonindex",
+            name="content_ts",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.contrib.postgres.search.CombinedSearchVector(
+                    django.contrib.postgres.search.SearchVector("title", config="french", weight="A"),
+                    "||",
+                    django.contrib.postgres.search.SearchVector("content", config="french", weight="B"),
+                    django.contrib.postgres.search.SearchConfig("french"),
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="commonindex",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["content_ts"], name="search_content_ts_gin"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.7 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("search", "0005_generated_content_ts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="indexversion",
+            name="generation",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
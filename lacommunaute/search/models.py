@@ -1,6 +1,7 @@
 import uuid
 
-from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
 
 
@@ -9,12 +10,41 @@ class CommonIndex(models.Model):
     A materialized view for use as a search index for categories and cards:
 
     To increase search performance, the indexed documents tsvector is
-    denormalized into the _ts field.
+    generated by Postgres into the _ts field, and GIN indexed.
     """
 
     id = models.UUIDField(primary_key=True, editable=False, verbose_name="ID", default=uuid.uuid4)
     title = models.CharField(editable=False)
     content = models.TextField(editable=False)
-    content_ts = SearchVectorField(editable=False)
+    # Computed by Postgres: title matches rank above content matches.
+    content_ts = models.GeneratedField(
+        expression=(
+            SearchVector("title", config="french", weight="A") + SearchVector("content", config="french", weight="B")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # Hash of the indexed title and content, to only refresh the documents that changed.
+    content_hash = models.CharField(editable=False)
     category_slug = models.CharField(editable=False)
     card_slug = models.CharField(editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["category_slug", "card_slug"], name="unique_indexed_document"),
+        ]
+        indexes = [
+            GinIndex(fields=["content_ts"], name="search_content_ts_gin"),
+        ]
+
+
+class IndexVersion(models.Model):
+    """
+    Fingerprint of all the documents indexed by the last `rebuild_index`,
+    to skip the refresh entirely when nothing changed.
+    The generation is bumped on each change, and invalidates cached searches.
+    """
+
+    fingerprint = models.CharField(editable=False)
+    generation = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,97 @@
+"""
+Static search index, searched by the browser.
+
+Most searches are a few keywords over a few hundred documents: the
+`build_search_index` command exports an inverted index of the documents as a
+content-hashed JSON file among the static files, which `search.js` downloads
+once and searches without reaching the server. SearchView remains the
+fallback without JavaScript, and answers the queries using the websearch
+syntax or words missing from the index.
+
+The words of the documents are mapped to their stems, the stems to the BM25
+score of each document containing them, as computed by the memory backend.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from functools import cache
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
+
+from lacommunaute.search.backends import MemorySearchBackend
+from lacommunaute.search.text import FRENCH_STOPWORDS
+
+
+# Bump when the structure of the index changes.
+STATIC_INDEX_VERSION = 1
+# Among the static files.
+STATIC_INDEX_DIR = "search"
+
+
+def static_index_directory():
+    return os.path.join(settings.STATICFILES_DIRS[0], STATIC_INDEX_DIR)
+
+
+def document_url(document):
+    if document["card_slug"]:
+        return reverse("documentation:card", kwargs={"slug": document["card_slug"]})
+    return reverse("documentation:category", kwargs={"slug": document["category_slug"]})
+
+
+def build_static_index(documents):
+    """
+    {
+        "version": STATIC_INDEX_VERSION,
+        "documents": [[title, url, category_slug], …],
+        "words": {casefolded word: stem number, …},
+        "postings": [[document number, score × 100, document number, …], …],
+        "stopwords": [stop word, …],
+    }
+    """
+    backend = MemorySearchBackend(documents)
+    stem_numbers = {}
+    postings = []
+    for stem in sorted(set(backend.title_postings) | set(backend.content_postings)):
+        indexes = backend.title_postings.get(stem, {}).keys() | backend.content_postings.get(stem, {}).keys()
+        stem_numbers[stem] = len(postings)
+        postings.append(
+            [value for index in sorted(indexes) for value in (index, round(backend.score(index, {stem}) * 100))]
+        )
+    return {
+        "version": STATIC_INDEX_VERSION,
+        "documents": [
+            [document["title"], document_url(document), document["category_slug"]] for document in backend.documents
+        ],
+        "words": {word: stem_numbers[stem] for word, stem in sorted(backend.stems.items()) if stem in stem_numbers},
+        "postings": postings,
+        "stopwords": sorted(FRENCH_STOPWORDS),
+    }
+
+
+def write_static_index(index, directory):
+    """Write the index as index.<hash>.json in directory, removing the previous ones. Return its file name."""
+    content = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode()
+    filename = f"index.{hashlib.sha256(content).hexdigest()[:12]}.json"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, filename)
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(content)
+    os.replace(f"{path}.tmp", path)
+    for previous in glob.glob(os.path.join(directory, "index.*.json")):
+        if previous != path:
+            os.remove(previous)
+    get_static_index_url.cache_clear()
+    return filename
+
+
+@cache
+def get_static_index_url():
+    """The URL of the static index written by `build_search_index`, None when missing."""
+    paths = glob.glob(os.path.join(static_index_directory(), "index.*.json"))
+    if not paths:
+        return None
+    return static(f"{STATIC_INDEX_DIR}/{os.path.basename(max(paths, key=os.path.getmtime))}")
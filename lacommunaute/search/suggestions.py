@@ -0,0 +1,66 @@
+import bisect
+import unicodedata
+from dataclasses import dataclass
+
+from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.partner.helpers import PARTNERS
+from lacommunaute.search.text import WORD_RE
+
+
+def fold(text):
+    """Casefold and strip the accents, so that "Mobilite" matches "mobilité"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    # "category", "card" or "partner".
+    kind: str
+    slug: str
+    name: str
+
+
+class SuggestionIndex:
+    """
+    Suggest names starting with a prefix, or with a word starting with it.
+
+    Every suffix of a name starting at a word is folded and kept in a sorted
+    array: the suggestions for a prefix are the consecutive keys starting
+    with it, found by bisection.
+    """
+
+    def __init__(self, suggestions):
+        entries = set()
+        for suggestion in suggestions:
+            folded = fold(suggestion.name)
+            for word in WORD_RE.finditer(folded):
+                entries.add((folded[word.start() :], suggestion))
+        entries = sorted(entries, key=lambda entry: (entry[0], entry[1].name))
+        self.keys = [key for key, _suggestion in entries]
+        self.suggestions = [suggestion for _key, suggestion in entries]
+
+    def suggest(self, prefix, limit=8):
+        prefix = " ".join(fold(prefix).split())
+        if not prefix:
+            return []
+        suggestions = []
+        for index in range(bisect.bisect_left(self.keys, prefix), len(self.keys)):
+            if not self.keys[index].startswith(prefix) or len(suggestions) == limit:
+                break
+            if (suggestion := self.suggestions[index]) not in suggestions:
+                suggestions.append(suggestion)
+        return suggestions
+
+
+def get_suggestions():
+    for category in CATEGORIES:
+        yield Suggestion("category", category["slug"], category["name"])
+    for card in CARDS.values():
+        yield Suggestion("card", card["slug"], card["name"])
+    for partner in PARTNERS.values():
+        yield Suggestion("partner", partner["slug"], partner["name"])
+
+
+# Built with the content, when the module is loaded.
+SUGGESTIONS = SuggestionIndex(get_suggestions())
@@ -0,0 +1,49 @@
+import itertools
+import re
+
+
+# The stop words of the PostgreSQL french dictionary (tsearch_data/french.stop),
+# ignored when searching.
+FRENCH_STOPWORDS = frozenset(
+    """
+    au aux avec ce ces dans de des du elle en et eux il je la le leur lui ma mais me même mes moi mon ne nos notre
+    nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous c d j l à m n s t
+    y été étée étées étés étant étante étants étantes suis es est sommes êtes sont serai seras sera serons serez
+    seront serais serait serions seriez seraient étais était étions étiez étaient fus fut fûmes fûtes furent sois
+    soit soyons soyez soient fusse fusses fût fussions fussiez fussent ayant ayante ayantes ayants eu eue eues eus ai
+    as avons avez ont aurai auras aura aurons aurez auront aurais aurait aurions auriez auraient avais avait avions
+    aviez avaient eut eûmes eûtes eurent aie aies ait ayons ayez aient eusse eusses eût eussions eussiez eussent
+    """.split()
+)
+
+# Words, as split by the PostgreSQL parser: letters and digits.
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_query(query):
+    """Casefold and collapse the whitespace, equivalent queries get the same cached results."""
+    return " ".join(query.casefold().split())
+
+
+def limit_terms(query, max_terms):
+    """
+    Keep the first max_terms words of the query, those of quoted phrases
+    included. Words are split as by the PostgreSQL parser: "emploi,formation"
+    counts as two words.
+    """
+    words = list(itertools.islice(WORD_RE.finditer(query), max_terms + 1))
+    if len(words) <= max_terms:
+        return query
+    return query[: words[max_terms].start()]
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.casefold())
+
+
+def is_empty_query(query):
+    """
+    Whether the query only contains stop words and websearch operators, which
+    PostgreSQL reduces to an empty tsquery matching nothing.
+    """
+    return all(word in FRENCH_STOPWORDS or word == "or" for word in tokenize(query))
@@ -8,4 +8,5 @@ app_name = "search"
 
 urlpatterns = [
     path("", views.SearchView.as_view(), name="index"),
+    path("suggestions", views.SuggestionsView.as_view(), name="suggestions"),
 ]
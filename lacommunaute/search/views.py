@@ -1,17 +1,41 @@
-from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
-from django.db.models import F
-from django.views.generic import ListView
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.generic import ListView, TemplateView
 from django.views.generic.edit import FormMixin
 
+from lacommunaute.documentation.helpers import CATEGORIES_BY_SLUG
+from lacommunaute.search.backends import get_backend
+from lacommunaute.search.executor import CursorPage, SearchPaginator
 from lacommunaute.search.forms import SearchForm
-from lacommunaute.search.models import CommonIndex
+from lacommunaute.search.static_index import get_static_index_url
+from lacommunaute.search.suggestions import SUGGESTIONS
+from lacommunaute.search.text import limit_terms
 
 
 class SearchView(FormMixin, ListView):
-    template_name = "search/results.html"
-    model = CommonIndex
     form_class = SearchForm
     paginate_by = 10
+    paginator_class = SearchPaginator
+    # The backend selected by the SEARCH_BACKEND setting, unless given to as_view().
+    backend = None
+    # See RateLimitMiddleware.
+    rate_limited = True
+
+    def get_template_names(self):
+        # History restoration needs the full page.
+        if self.request.META.get("HTTP_HX_REQUEST") and not self.request.META.get("HTTP_HX_HISTORY_RESTORE_REQUEST"):
+            if settings.SEARCH_CURSOR_PAGINATION and self.request.GET.get("cursor"):
+                return ["search/partials/result_rows.html"]
+            return ["search/partials/results.html"]
+        return ["search/results.html"]
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_vary_headers(response, ["HX-Request"])
+        return response
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -19,33 +43,51 @@ class SearchView(FormMixin, ListView):
         kwargs["data"] = data
         return kwargs
 
+    def paginate_queryset(self, queryset, page_size):
+        if not settings.SEARCH_CURSOR_PAGINATION:
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            page = CursorPage(queryset, self.request.GET.get("cursor"), page_size)
+        except ValueError:
+            raise Http404
+        return None, page, page.object_list, False
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if settings.SEARCH_CURSOR_PAGINATION:
+            context["result_count"] = context["page_obj"].count
+            context["result_count_capped"] = context["page_obj"].capped
+        else:
+            context["result_count"] = context["paginator"].count
+            context["result_count_capped"] = self.object_list.capped()
+        form = context["form"]
+        category_slug = form.cleaned_data["category"] if form.is_valid() else None
+        if category_slug:
+            context["category"] = CATEGORIES_BY_SLUG[category_slug]
+        else:
+            # Counted in the capped ranking: a search in the category may find more.
+            context["category_counts_capped"] = self.object_list.capped()
+            context["category_counts"] = [
+                (CATEGORIES_BY_SLUG[slug], count)
+                for slug, count in self.object_list.category_counts()
+                if slug in CATEGORIES_BY_SLUG
+            ]
+        context["search_index_url"] = get_static_index_url()
+        return context
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        backend = self.backend or get_backend()
         form = self.get_form()
         if not form.is_valid() or not form.cleaned_data["q"]:
-            return queryset.none()
-        search_query = SearchQuery(
-            form.cleaned_data["q"],
-            config="french",
-            search_type="websearch",
-        )
-        return (
-            queryset.annotate(rank=SearchRank(F("content_ts"), search_query, cover_density=True))
-            # Arbitrary threshold. From running a couple searches, good results
-            # are above 1.0, standard results are above 0.2 and OK results are
-            # around 0.1. Take a generous margin, and exclude irrelevant
-            # results.
-            .filter(rank__gte=0.01)
-            .annotate(
-                headline=SearchHeadline(
-                    # Don’t highlight matches in title, it already stands out.
-                    "content",
-                    search_query,
-                    config="french",
-                    fragment_delimiter="…",
-                    start_sel='<span class="highlighted">',
-                    stop_sel="</span>",
-                )
-            )
-            .order_by("-rank")
-        )
+            return backend.search(None)
+        query = limit_terms(form.cleaned_data["q"], settings.SEARCH_MAX_TERMS)
+        return backend.search(query, form.cleaned_data["category"] or None)
+
+
+# Answered from memory, no need for a transaction.
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class SuggestionsView(TemplateView):
+    template_name = "search/partials/suggestions.html"
+
+    def get_context_data(self, **kwargs):
+        return {"suggestions": SUGGESTIONS.suggest(self.request.GET.get("q", "")[:255])}
@@ -0,0 +1,150 @@
+/********************************************************************
+    Search the static index in the browser, without reaching the server.
+    See lacommunaute/search/static_index.py.
+    Usage:
+    <form data-search-index="/static/search/index.<hash>.json"
+    data-search-results="#search_results">
+    The queries using quotes, `or`, `-` or words missing from the index
+    are submitted to the server.
+********************************************************************/
+(function () {
+    "use strict";
+
+    // Words, as split by the PostgreSQL parser: letters and digits.
+    const WORD_RE = /[\p{L}\p{N}]+/gu;
+    const MAX_RESULTS = 50;
+    const indexes = {};
+
+    function loadIndex(url) {
+        if (!(url in indexes)) {
+            indexes[url] = null;
+            fetch(url)
+                .then((response) => (response.ok ? response.json() : null))
+                .then((index) => {
+                    if (index && index.version === 1) {
+                        index.stopwords = new Set(index.stopwords);
+                        indexes[url] = index;
+                    }
+                })
+                .catch(() => {});
+        }
+        return indexes[url];
+    }
+
+    // The stem numbers of the query words, null when the server must answer.
+    function parse(index, query) {
+        if (/["-]/.test(query) || /(^|\s)or(\s|$)/i.test(query)) {
+            return null;
+        }
+        const stems = new Set();
+        for (const [word] of query.toLowerCase().matchAll(WORD_RE)) {
+            if (index.stopwords.has(word)) {
+                continue;
+            }
+            if (!(word in index.words)) {
+                return null;
+            }
+            stems.add(index.words[word]);
+        }
+        return stems.size ? [...stems] : null;
+    }
+
+    // The documents containing all the stems, best first.
+    function search(index, stems, category) {
+        let scores = null;
+        for (const stem of stems) {
+            const postings = index.postings[stem];
+            const next = new Map();
+            for (let i = 0; i < postings.length; i += 2) {
+                if (scores === null || scores.has(postings[i])) {
+                    next.set(postings[i], (scores === null ? 0 : scores.get(postings[i])) + postings[i + 1]);
+                }
+            }
+            scores = next;
+        }
+        return [...scores]
+            .filter(([document]) => !category || index.documents[document][2] === category)
+            .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+            .map(([document]) => index.documents[document]);
+    }
+
+    function element(tag, className, text) {
+        const node = document.createElement(tag);
+        if (className) {
+            node.className = className;
+        }
+        if (text) {
+            node.textContent = text;
+        }
+        return node;
+    }
+
+    function render(results, moreUrl) {
+        const box = element("div", "c-box");
+        const count = results.length;
+        box.append(element("h3", "h4 mb-0", count ? `${count} résultat${count > 1 ? "s" : ""}` : "Aucun résultat."));
+        if (count) {
+            const tbody = element("tbody");
+            for (const [title, url] of results.slice(0, MAX_RESULTS)) {
+                const link = element("a", "btn-link btn-ico stretched-link");
+                link.href = url;
+                link.append(element("i", "ri-article-line"), element("span", null, title));
+                const cell = element("td", "position-relative");
+                cell.append(link);
+                const tr = element("tr");
+                tr.append(cell);
+                tbody.append(tr);
+            }
+            const table = element("table", "table table-hover mt-3 mt-md-4");
+            table.append(tbody);
+            const wrapper = element("div", "table-responsive-lg");
+            wrapper.append(table);
+            box.append(wrapper);
+        }
+        if (count > MAX_RESULTS) {
+            const more = element("a", "btn btn-outline-primary", "Voir tous les résultats");
+            more.href = moreUrl;
+            box.append(more);
+        }
+        const column = element("div", "col-12");
+        column.append(box);
+        const row = element("div", "row mt-3");
+        row.append(column);
+        return row;
+    }
+
+    document.addEventListener(
+        "focusin",
+        (event) => {
+            const form = event.target.closest && event.target.closest("form[data-search-index]");
+            if (form) {
+                loadIndex(form.dataset.searchIndex);
+            }
+        },
+        true,
+    );
+
+    // Captured before htmx handles the submission.
+    document.addEventListener(
+        "submit",
+        (event) => {
+            const form = event.target;
+            const target = form.dataset && form.dataset.searchIndex && document.querySelector(form.dataset.searchResults);
+            const index = target && loadIndex(form.dataset.searchIndex);
+            if (!index) {
+                return;
+            }
+            const data = new FormData(form);
+            const stems = parse(index, data.get("q") || "");
+            if (!stems) {
+                return;
+            }
+            event.preventDefault();
+            event.stopPropagation();
+            const url = `${form.action}?${new URLSearchParams(data)}`;
+            target.replaceChildren(render(search(index, stems, data.get("category")), url));
+            history.pushState({}, "", url);
+        },
+        true,
+    );
+})();
@@ -0,0 +1,224 @@
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# Bounded set of locks coalescing the computations of this process.
+_LOCKS = [threading.Lock() for _ in range(64)]
+# How long a process waits for the value being computed by another one.
+COALESCE_TIMEOUT = 5
+
+
+def get_or_compute(key, compute, timeout):
+    """
+    Return the cached value for key, or compute and cache it.
+    Concurrent misses for the same key are coalesced: only one of them
+    computes the value, the others wait for it. With the TieredCache, stale
+    values are served while one process recomputes them.
+    """
+    return cache.get_or_set(key, compute, timeout)
+
+
+class MemoryStore:
+    """The pickled entries of a TieredCache held by this process, the least recently used are evicted."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key):
+        with self.lock:
+            if (item := self.entries.get(key)) is None:
+                return None
+            pickled, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return pickled
+
+    def set(self, key, pickled, expires_at):
+        with self.lock:
+            self.entries[key] = (pickled, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def count(self, event):
+        with self.lock:
+            self.stats[event] += 1
+
+
+def is_fresh(entry):
+    _value, fresh_until = entry
+    return fresh_until is None or fresh_until > time.time()
+
+
+# The L1 of each TieredCache, shared by the threads of this process.
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """
+    A bounded in-process LRU cache (L1) in front of a cache shared by all
+    processes (L2), the cache named by LOCATION.
+
+    Values are kept in L1 for L1_TIMEOUT seconds at most: a value changed
+    or deleted by another process is seen after that delay. Values stay in
+    L2 STALE_TIMEOUT seconds after their timeout: `get_or_set()` serves them
+    while a single process recomputes them, `get()` ignores them. Concurrent
+    misses in `get_or_set()` are coalesced, with a lock added to L2.
+
+    `stats()` counts the L1 and L2 hits, the stale hits and the misses of
+    this process.
+
+    OPTIONS:
+    - MAX_ENTRIES: the size of L1, 1000 by default;
+    - L1_TIMEOUT: 5 seconds by default;
+    - STALE_TIMEOUT: 60 seconds by default.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        super().__init__({**params, "OPTIONS": {"MAX_ENTRIES": 1000, **options}})
+        self.l2_alias = location
+        self.l1_timeout = options.get("L1_TIMEOUT", 5)
+        self.stale_timeout = options.get("STALE_TIMEOUT", 60)
+        with _stores_lock:
+            self.l1 = _stores.setdefault(location, MemoryStore(self._max_entries))
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def get_entry(self, key, version=None):
+        """The (value, fresh_until) entry of key, fresh_until is None for values which don't expire."""
+        l1_key = self.make_and_validate_key(key, version=version)
+        if (pickled := self.l1.get(l1_key)) is not None:
+            self.l1.count("l1_hits")
+            return pickle.loads(pickled)
+        if (entry := self.l2.get(key, version=version)) is None:
+            self.l1.count("misses")
+            return None
+        self.l1.count("l2_hits")
+        self.set_l1(l1_key, entry)
+        return entry
+
+    def set_l1(self, l1_key, entry):
+        _value, fresh_until = entry
+        remaining = self.l1_timeout if fresh_until is None else min(self.l1_timeout, fresh_until - time.time())
+        if remaining > 0:
+            self.l1.set(l1_key, pickle.dumps(entry, self.pickle_protocol), time.monotonic() + remaining)
+
+    def make_entry(self, value, timeout):
+        """The entry of value and its timeout in L2, None when it expires immediately."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return (value, None), None
+        if timeout <= 0:
+            return None, 0
+        return (value, time.time() + timeout), timeout + self.stale_timeout
+
+    def get(self, key, default=None, version=None):
+        entry = self.get_entry(key, version=version)
+        return entry[0] if entry is not None and is_fresh(entry) else default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        entry, l2_timeout = self.make_entry(value, timeout)
+        l1_key = self.make_and_validate_key(key, version=version)
+        if entry is None:
+            self.delete(key, version=version)
+            return
+        self.l2.set(key, entry, l2_timeout, version=version)
+        self.set_l1(l1_key, entry)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Atomic in L2, once the stale value is deleted.
+        entry, l2_timeout = self.make_entry(value, timeout)
+        if entry is None:
+            return False
+        if (current := self.l2.get(key, version=version)) is not None:
+            if is_fresh(current):
+                return False
+            self.l2.delete(key, version=version)
+        if not self.l2.add(key, entry, l2_timeout, version=version):
+            return False
+        self.set_l1(self.make_and_validate_key(key, version=version), entry)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if (value := self.get(key, version=version)) is None:
+            return False
+        self.set(key, value, timeout, version=version)
+        return True
+
+    def delete(self, key, version=None):
+        deleted_l1 = self.l1.delete(self.make_and_validate_key(key, version=version))
+        return self.l2.delete(key, version=version) or deleted_l1
+
+    def has_key(self, key, version=None):
+        return self.get(key, version=version) is not None
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        entry = self.get_entry(key, version=version)
+        if entry is not None:
+            value, _fresh_until = entry
+            if is_fresh(entry):
+                return value
+            # Stale: recomputed by the process adding the lock, served to the others meanwhile.
+            if not self.l2.add(f"{key}:lock", True, COALESCE_TIMEOUT, version=version):
+                self.l1.count("stale_hits")
+                return value
+            try:
+                return self.compute_and_set(key, default, timeout, version)
+            finally:
+                self.l2.delete(f"{key}:lock", version=version)
+
+        with _LOCKS[hash(key) % len(_LOCKS)]:
+            if (value := self.get(key, version=version)) is not None:
+                return value
+            locked = self.l2.add(f"{key}:lock", True, COALESCE_TIMEOUT, version=version)
+            if not locked:
+                # Another process is computing the value.
+                deadline = time.monotonic() + COALESCE_TIMEOUT
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    if (entry := self.l2.get(key, version=version)) is not None and is_fresh(entry):
+                        return entry[0]
+            try:
+                return self.compute_and_set(key, default, timeout, version)
+            finally:
+                if locked:
+                    self.l2.delete(f"{key}:lock", version=version)
+
+    def compute_and_set(self, key, default, timeout, version):
+        value = default() if callable(default) else default
+        if value is not None:
+            self.set(key, value, timeout, version=version)
+        return value
+
+    def stats(self):
+        with self.l1.lock:
+            return {event: self.l1.stats[event] for event in ["l1_hits", "l2_hits", "stale_hits", "misses"]}
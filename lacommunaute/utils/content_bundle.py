@@ -0,0 +1,82 @@
+"""
+Precompiled content bundle.
+
+Categories, cards and partners are authored as markdown files. Parsing them and
+rendering their HTML at import time, in every worker, is slow and gets slower as
+the number of fiches grows. The `build_content_bundle` management command
+compiles them once, at build time, into a single pickled artifact which the
+helpers load instead of parsing the markdown.
+
+The bundle records a fingerprint of its sources: when they changed since the
+bundle was built (or the bundle is missing), the helpers fall back to parsing.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+from functools import cache
+
+import markdown
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when the structure of the bundle changes.
+BUNDLE_VERSION = 1
+
+SOURCES = [
+    "lacommunaute/documentation/helpers.py",
+    "lacommunaute/documentation/data/*/*.md",
+    "lacommunaute/partner/helpers.py",
+    "lacommunaute/partner/data/*.md",
+]
+
+
+def sources_fingerprint():
+    digest = hashlib.sha256(f"{BUNDLE_VERSION}:{markdown.__version__}".encode())
+    for pattern in SOURCES:
+        for filename in sorted(glob.glob(pattern)):
+            digest.update(filename.encode())
+            with open(filename, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def write_bundle(path, content):
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "fingerprint": sources_fingerprint(),
+        "content": content,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def read_bundle(path):
+    """
+    Return the content stored in the bundle, or None when the bundle is
+    missing, unreadable or stale.
+    """
+    try:
+        with open(path, "rb") as f:
+            bundle = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Unable to read content bundle %s", path, exc_info=True)
+        return None
+
+    if bundle.get("version") != BUNDLE_VERSION or bundle.get("fingerprint") != sources_fingerprint():
+        logger.warning("Content bundle %s is stale, falling back to parsing markdown", path)
+        return None
+    return bundle["content"]
+
+
+@cache
+def load():
+    return read_bundle(settings.CONTENT_BUNDLE_PATH)
@@ -2,6 +2,10 @@ import logging
 from urllib.parse import urlencode
 
 from django.conf import settings
+from django.middleware.csp import get_nonce
+
+from lacommunaute.utils.csp import uses_csp_nonce
+from lacommunaute.utils.page_cache import placeholders
 
 
 logger = logging.getLogger(__name__)
@@ -24,6 +28,15 @@ def expose_settings(request):
     }
 
 
+def csp(request):
+    """
+    The CSP nonce, only rendered in "nonce" mode and by the views decorated
+    with `csp_nonce`: using it adds it to the header, and makes the page unique.
+    """
+    use_csp_nonce = uses_csp_nonce(request)
+    return {"csp_nonce": get_nonce(request) if use_csp_nonce else "", "use_csp_nonce": use_csp_nonce}
+
+
 def matomo(request):
     if not request.resolver_match:
         return {}
@@ -38,3 +51,10 @@ def matomo(request):
     if params:
         url = f"{url}?{urlencode(sorted(params.items()), doseq=True)}"
     return {"matomo_custom_url": url}
+
+
+def page_cache(request):
+    """Render the cached pages with placeholders instead of the values specific to each request."""
+    if getattr(request, "page_cache_key", None) is None:
+        return {}
+    return placeholders()
@@ -0,0 +1,78 @@
+"""
+Content Security Policy of the inline scripts.
+
+By default, our inline scripts are allowed by the hash of their content,
+listed in the `script-src` directive: they don't depend on the request (the
+values they need are read from JSON data blocks, which aren't executed), so
+the pages are identical for every visitor and can be served from a cache.
+The hashes are computed from the templates when the settings are loaded.
+
+With CSP_MODE = "nonce", or for the views decorated with `csp_nonce`, the
+inline scripts are allowed by a nonce generated for each response instead.
+"""
+
+import base64
+import glob
+import hashlib
+import os
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.utils.csp import CSP
+from django.views.decorators.csp import csp_override
+
+
+INLINE_SCRIPT_RE = re.compile(r"<script\b(?P<attrs>[^>]*)>(?P<body>.*?)</script>", re.DOTALL)
+DATA_BLOCK_TYPE_RE = re.compile(r"""\btype=["']?application/(ld\+)?json""")
+
+
+class DynamicInlineScript(Exception):
+    pass
+
+
+def script_hash(body):
+    return f"'sha256-{base64.b64encode(hashlib.sha256(body.encode()).digest()).decode()}'"
+
+
+def inline_script_hashes(directories):
+    """
+    The CSP sources allowing the inline scripts of the templates found in
+    directories. Raise DynamicInlineScript for a script depending on the
+    context: its hash can't be known in advance.
+    """
+    hashes = set()
+    for directory in directories:
+        for filename in sorted(glob.glob(os.path.join(directory, "**", "*.html"), recursive=True)):
+            with open(filename, encoding="utf-8") as f:
+                source = f.read()
+            for match in INLINE_SCRIPT_RE.finditer(source):
+                if "src=" in match["attrs"] or DATA_BLOCK_TYPE_RE.search(match["attrs"]):
+                    continue
+                if re.search(r"\{[{%#]", match["body"]):
+                    raise DynamicInlineScript(
+                        f"{filename}: the inline scripts can't use template tags or variables, "
+                        "read the values from a JSON data block (`json_script` filter) instead."
+                    )
+                hashes.add(script_hash(match["body"]))
+    return sorted(hashes)
+
+
+def uses_csp_nonce(request):
+    return settings.CSP_MODE == "nonce" or getattr(request, "csp_nonce", False)
+
+
+def csp_nonce(view_func):
+    """Allow the inline scripts of the view by a nonce, for the scripts depending on the request."""
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        # Read by the `csp` context processor.
+        request.csp_nonce = True
+        config = {**settings.SECURE_CSP}
+        for directive in ["script-src", "script-src-elem"]:
+            if CSP.NONCE not in config.get(directive, []):
+                config[directive] = [*config.get(directive, []), CSP.NONCE]
+        return csp_override(config)(view_func)(request, *args, **kwargs)
+
+    return wrapper
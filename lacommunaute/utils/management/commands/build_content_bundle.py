@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lacommunaute.documentation.helpers import parse_cards, parse_categories
+from lacommunaute.partner.helpers import parse_partners
+from lacommunaute.utils.content_bundle import write_bundle
+
+
+class Command(BaseCommand):
+    help = "Compile categories, cards and partners into the content bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=settings.CONTENT_BUNDLE_PATH, help="Path of the bundle to write")
+
+    def handle(self, *args, output, **kwargs):
+        content = {
+            "categories": parse_categories(),
+            "cards": parse_cards(),
+            "partners": parse_partners(),
+        }
+        write_bundle(output, content)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Content bundle written to {output}: {len(content['categories'])} categories, "
+                f"{len(content['cards'])} cards, {len(content['partners'])} partners."
+            )
+        )
@@ -0,0 +1,52 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from lacommunaute.utils.prerender import PrerenderMismatch, get_urls, prerender, prune, write_variants_index
+
+
+class Command(BaseCommand):
+    help = "Render the documentation and partner pages to static files, served by the front web server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", default=settings.PRERENDER_DIR, help="Directory of the pages")
+        parser.add_argument("--host", default=settings.ALLOWED_HOSTS[0], help="Host of the rendered requests")
+        parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of processes")
+        parser.add_argument(
+            "--no-verify", action="store_false", dest="verify", help="Don't compare with the pages served by Django"
+        )
+
+    def handle(self, *args, output_dir, host, jobs, verify, **kwargs):
+        if settings.CSP_MODE == "nonce":
+            raise CommandError("The pages can't be pre-rendered in CSP nonce mode, each of them needs a nonce.")
+        urls = get_urls()
+        tasks = [partial(prerender, url, output_dir, host, verify) for url in urls]
+        if jobs > 1:
+            # The processes open their own connections.
+            connections.close_all()
+            with ProcessPoolExecutor(jobs, initializer=django.setup) as executor:
+                futures = [executor.submit(task) for task in tasks]
+                outcomes = [self.outcome(future.result) for future in futures]
+        else:
+            outcomes = [self.outcome(task) for task in tasks]
+        if errors := [error for _path, error in outcomes if error]:
+            raise CommandError("\n".join(errors))
+        variants = write_variants_index(output_dir, urls)
+        removed = prune(output_dir, [path for path, _error in outcomes])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(outcomes)} pages written to {output_dir}, including {len(variants)} tag variants, "
+                f"{len(removed)} outdated files removed."
+            )
+        )
+
+    def outcome(self, run):
+        try:
+            return run(), None
+        except PrerenderMismatch as e:
+            return None, str(e)
@@ -1,5 +1,18 @@
+import math
+
 from django.conf import settings
+from django.contrib.redirects.middleware import RedirectFallbackMiddleware as BaseRedirectFallbackMiddleware
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_cache_key, get_conditional_response, learn_cache_key, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from lacommunaute.pages.flatpages import get_redirect
+from lacommunaute.utils import page_cache
+from lacommunaute.utils.context_processors import matomo
+from lacommunaute.utils.ratelimit import is_crawler, take_token
 
 
 class ParkingPageMiddleware:
@@ -11,3 +24,106 @@ class ParkingPageMiddleware:
             return render(request, "middleware/parking.html")
         response = self.get_response(request)
         return response
+
+
+class RedirectFallbackMiddleware(BaseRedirectFallbackMiddleware):
+    """Read the redirects from their snapshot, see `lacommunaute.pages.flatpages`."""
+
+    def process_response(self, request, response):
+        if response.status_code != 404:
+            return response
+        site_id = get_current_site(request).id
+        new_path = get_redirect(site_id, request.get_full_path())
+        if new_path is None and settings.APPEND_SLASH and not request.path.endswith("/"):
+            new_path = get_redirect(site_id, request.get_full_path(force_append_slash=True))
+        if new_path is None:
+            return response
+        if new_path == "":
+            return self.response_gone_class()
+        return self.response_redirect_class(new_path)
+
+
+class RateLimitMiddleware:
+    """
+    Rate limit the views with a `rate_limited` attribute, with token buckets
+    per client IP and global. Over the limit, a cheap 429 response tells when
+    to retry. Crawlers are served the responses cached for them, without
+    running the view.
+    """
+
+    key_prefix = "crawler"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if getattr(request, "cache_for_crawlers", False) and response.status_code == 200 and not response.cookies:
+            key = learn_cache_key(request, response, settings.SEARCH_CACHE_TIMEOUT, self.key_prefix, cache=cache)
+            cache.set(key, response, settings.SEARCH_CACHE_TIMEOUT)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(getattr(view_func, "view_class", view_func), "rate_limited", False):
+            return None
+        if request.method == "GET" and is_crawler(request):
+            key = get_cache_key(request, self.key_prefix, "GET", cache=cache)
+            if key and (response := cache.get(key)) is not None:
+                return response
+            request.cache_for_crawlers = True
+        if wait := take_token(request):
+            response = HttpResponse(
+                "Trop de requêtes, veuillez réessayer plus tard.", status=429, content_type="text/plain; charset=utf-8"
+            )
+            response.headers["Retry-After"] = str(math.ceil(wait))
+            return response
+        return None
+
+
+class PageCacheMiddleware:
+    """
+    Cache the pages of the views with a `page_cached` attribute, by the
+    query parameters listed in their `page_cache_params` attribute, see
+    `lacommunaute.utils.page_cache`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, "page_cache_key", None)
+        if key is None:
+            return response
+        patch_vary_headers(response, ["HX-Request"])
+        if response.status_code == 200 and not response.streaming and not response.cookies:
+            cache.set(key, (response.content, list(response.items())), settings.PAGE_CACHE_TIMEOUT)
+        response.content = page_cache.fill_placeholders(response.content, request, request.matomo_custom_url)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", view_func)
+        cached_view = getattr(view_class, "page_cached", False)
+        if not cached_view or request.method not in ("GET", "HEAD") or not settings.PAGE_CACHE_TIMEOUT:
+            return None
+        key = page_cache.get_cache_key(request, getattr(view_class, "page_cache_params", ()))
+        matomo_custom_url = matomo(request).get("matomo_custom_url", "")
+        if (cached := cache.get(key)) is not None:
+            content, headers = cached
+            response = HttpResponse()
+            for header, value in headers:
+                response.headers[header] = value
+            # The ETag and Last-Modified of the view, see `page_cache.conditional_page`.
+            page_cache.ignore_revalidation(request)
+            last_modified = parse_http_date_safe(response.get("Last-Modified"))
+            conditional_response = get_conditional_response(
+                request, etag=response.get("ETag"), last_modified=last_modified, response=response
+            )
+            if conditional_response is not response:
+                return conditional_response
+            response.content = page_cache.fill_placeholders(content, request, matomo_custom_url)
+            return response
+        # Rendered with the placeholders, see the page_cache context processor.
+        request.page_cache_key = key
+        request.matomo_custom_url = matomo_custom_url
+        return None
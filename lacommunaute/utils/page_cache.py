@@ -0,0 +1,138 @@
+"""
+Full-page cache of the content views, identical for every visitor.
+
+The pages are rendered once with placeholders instead of the values
+specific to each request (the CSRF token, the CSP nonce in "nonce" mode
+and the Matomo custom URL, which keeps the tracking parameters), and the
+placeholders are replaced when serving them. Only the query parameters read
+by the view, listed by its `page_cache_params` attribute, are part of the
+cache key: the tracking parameters and the unknown ones share the page
+without them. htmx requests are cached apart.
+
+The key includes a fingerprint of the content, the templates, the
+compressed stylesheets and the deployed code (DEPLOY_ID): the pages cached
+before a deployment are never served again.
+The same fingerprint is the ETag of the pages, see `conditional_page`.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from functools import cache, wraps
+from urllib.parse import urlencode
+
+from compressor.cache import get_offline_manifest
+from django.conf import settings
+from django.middleware.csp import get_nonce
+from django.middleware.csrf import get_token
+from django.utils.decorators import method_decorator
+from django.utils.html import escape
+from django.views.decorators.http import condition
+
+from lacommunaute.utils.content_bundle import sources_fingerprint
+from lacommunaute.utils.csp import uses_csp_nonce
+
+
+CSRF_TOKEN_PLACEHOLDER = "pagecache0csrf0token"
+CSP_NONCE_PLACEHOLDER = "pagecache0csp0nonce"
+MATOMO_CUSTOM_URL_PLACEHOLDER = "pagecache0matomo0custom0url"
+
+# As escaped by the `json_script` filter.
+JSON_SCRIPT_ESCAPES = {ord(">"): "\\u003E", ord("<"): "\\u003C", ord("&"): "\\u0026"}
+
+
+@cache
+def content_version():
+    digest = hashlib.sha256(sources_fingerprint().encode())
+    digest.update(settings.DEPLOY_ID.encode())
+    # The URLs of the compressed stylesheets, which change with the SCSS.
+    digest.update(json.dumps(get_offline_manifest(), sort_keys=True).encode())
+    for directory in settings.TEMPLATES[0]["DIRS"]:
+        for filename in sorted(glob.glob(os.path.join(directory, "**", "*"), recursive=True)):
+            if os.path.isfile(filename):
+                digest.update(filename.encode())
+                with open(filename, "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def get_variant(request):
+    return "htmx" if request.headers.get("HX-Request") else "page"
+
+
+def get_cache_key(request, accepted_params=()):
+    params = sorted((k, v) for k, v in request.GET.lists() if k in accepted_params)
+    url = f"{request.get_host()}{request.path}?{urlencode(params, doseq=True)}"
+    return f"page:{content_version()}:{hashlib.sha256(url.encode()).hexdigest()}:{get_variant(request)}"
+
+
+def ignore_revalidation(request):
+    """
+    Ignore the conditional headers of a request without CSRF cookie: the
+    page kept by the browser holds a token for a cookie it no longer has,
+    its forms and htmx POSTs would fail after a 304. The page is sent again,
+    with a new cookie.
+    """
+    if settings.CSRF_COOKIE_NAME not in request.COOKIES:
+        for header in ["HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE"]:
+            request.META.pop(header, None)
+
+
+def conditional_page(last_modified_func=None):
+    """
+    Answer the conditional requests for the pages of a view with a 304,
+    without rendering them. The ETag is the content version, Last-Modified
+    is returned by last_modified_func(request, *args, **kwargs).
+
+    Not in "nonce" mode: the pages kept by the browsers would have an
+    outdated nonce. Nor without CSRF cookie, see `ignore_revalidation`.
+    """
+
+    def etag(request, *args, **kwargs):
+        if uses_csp_nonce(request):
+            return None
+        return f"{content_version()}-{get_variant(request)}"
+
+    def last_modified(request, *args, **kwargs):
+        if last_modified_func is None or uses_csp_nonce(request):
+            return None
+        return last_modified_func(request, *args, **kwargs)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            ignore_revalidation(request)
+            return conditional_view(request, *args, **kwargs)
+
+        return wrapper
+
+    return method_decorator(decorator, name="dispatch")
+
+
+def placeholders():
+    """The context rendering the cached pages, overriding the values of the context processors."""
+    return {
+        "csrf_token": CSRF_TOKEN_PLACEHOLDER,
+        "csp_nonce": CSP_NONCE_PLACEHOLDER,
+        "matomo_custom_url": MATOMO_CUSTOM_URL_PLACEHOLDER,
+    }
+
+
+def json_script_escape(value):
+    """The string value in a `json_script` data block, without its quotes."""
+    return json.dumps(value)[1:-1].translate(JSON_SCRIPT_ESCAPES)
+
+
+def fill_placeholders(content, request, matomo_custom_url):
+    for placeholder, get_value in [
+        (CSRF_TOKEN_PLACEHOLDER, lambda: escape(get_token(request))),
+        # Using the nonce adds it to the CSP header.
+        (CSP_NONCE_PLACEHOLDER, lambda: escape(str(get_nonce(request)))),
+        (MATOMO_CUSTOM_URL_PLACEHOLDER, lambda: json_script_escape(matomo_custom_url)),
+    ]:
+        if placeholder.encode() in content:
+            content = content.replace(placeholder.encode(), get_value().encode())
+    return content
@@ -0,0 +1,138 @@
+"""
+Static pre-rendering of the documentation and partner pages.
+
+These pages only depend on the markdown content: the `prerender_pages`
+command renders them to HTML files, with precompressed .gz and .br
+siblings, which the front web server can serve directly. Django keeps serving the search, the flatpages and the htmx
+requests, which the front web server must pass through.
+
+A page is written under its URL path, plus ".html" (or "index.html" for the
+paths ending with a slash). The variants of the categories filtered by tag
+are written as <category>/tags/<tag>.html, and listed with their URL in
+VARIANTS_INDEX. The pages left by a previous run which weren't rendered
+again, such as the pages of deleted cards, are removed.
+
+The pages are rendered without the middlewares, with the placeholders of
+the page cache: the Matomo custom URL is filled in, the CSRF token is left
+empty, these pages don't send forms. They are compared with the pages
+served by the whole stack.
+"""
+
+import glob
+import gzip
+import json
+import os
+import re
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+import brotli
+from django.test import Client, RequestFactory
+from django.urls import resolve, reverse
+
+from lacommunaute.documentation.helpers import TAGS_BY_CATEGORY
+from lacommunaute.pages.sitemaps import DocumentationCardSitemap, DocumentationCategorySitemap, PartnerSitemap
+from lacommunaute.utils.context_processors import matomo
+from lacommunaute.utils.page_cache import CSRF_TOKEN_PLACEHOLDER, MATOMO_CUSTOM_URL_PLACEHOLDER, json_script_escape
+
+
+VARIANTS_INDEX = "variants.json"
+# Rendered when the page is rendered.
+CREATED_META_RE = re.compile(rb'<meta name="created" content="[^"]*">')
+CSRF_TOKEN_RE = re.compile(rb'<meta name="csrf-token" content="(\w*)">')
+
+
+class PrerenderMismatch(Exception):
+    pass
+
+
+def get_urls():
+    """The URLs of the documentation and partner pages: the indexes, the sitemaps and the tag variants."""
+    urls = [reverse("documentation:index"), reverse("partner:list")]
+    for sitemap in [DocumentationCategorySitemap(), DocumentationCardSitemap(), PartnerSitemap()]:
+        urls += [sitemap.location(item) for item in sitemap.items()]
+    for category_slug, tags in TAGS_BY_CATEGORY.items():
+        category_url = reverse("documentation:category", kwargs={"slug": category_slug})
+        urls += [f"{category_url}?{urlencode({'tag': tag['slug']})}" for tag in tags]
+    return urls
+
+
+def get_path(url):
+    """The path of the file of url, relative to the output directory."""
+    parts = urlsplit(url)
+    path = unquote(parts.path).lstrip("/")
+    if parts.query:
+        [tag] = parse_qs(parts.query)["tag"]
+        return os.path.join(path, "tags", f"{tag}.html")
+    if not path or path.endswith("/"):
+        return os.path.join(path, "index.html")
+    return f"{path}.html"
+
+
+def render(url, host):
+    """The content of the page at url, rendered without the middlewares."""
+    request = RequestFactory().get(url, HTTP_HOST=host, secure=True)
+    request.resolver_match = resolve(request.path_info)
+    # Rendered with the placeholders, see the page_cache context processor.
+    request.page_cache_key = "prerender"
+    match = request.resolver_match
+    response = match.func(request, *match.args, **match.kwargs)
+    response.render()
+    return response.content.replace(CSRF_TOKEN_PLACEHOLDER.encode(), b"").replace(
+        MATOMO_CUSTOM_URL_PLACEHOLDER.encode(), json_script_escape(matomo(request)["matomo_custom_url"]).encode()
+    )
+
+
+def render_live(url, host):
+    """The content of the page at url served by Django, without its CSRF token."""
+    response = Client().get(url, HTTP_HOST=host, secure=True)
+    if response.status_code != 200:
+        raise PrerenderMismatch(f"{url} is answered with a {response.status_code}")
+    content = response.content
+    if match := CSRF_TOKEN_RE.search(content):
+        content = content.replace(match[1], b"")
+    return content
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    files = [
+        (path, content),
+        (f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0)),
+        (f"{path}.br", brotli.compress(content)),
+    ]
+    for filename, data in files:
+        with open(f"{filename}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{filename}.tmp", filename)
+
+
+def prerender(url, output_dir, host, verify=True):
+    """Write the page at url in output_dir, raise PrerenderMismatch when it differs from the served page."""
+    content = render(url, host)
+    if verify and CREATED_META_RE.sub(b"", content) != CREATED_META_RE.sub(b"", render_live(url, host)):
+        raise PrerenderMismatch(f"{url} differs from the page served by Django")
+    path = get_path(url)
+    write(os.path.join(output_dir, path), content)
+    return path
+
+
+def write_variants_index(output_dir, urls):
+    variants = {url: get_path(url) for url in urls if urlsplit(url).query}
+    with open(os.path.join(output_dir, VARIANTS_INDEX), "w") as f:
+        json.dump(variants, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return variants
+
+
+def prune(output_dir, paths):
+    """Remove the pages of output_dir which aren't in paths, return their paths."""
+    output_dir = str(output_dir)
+    kept = {os.path.join(output_dir, f"{path}{suffix}") for path in paths for suffix in ["", ".gz", ".br"]}
+    removed = []
+    for filename in glob.glob(os.path.join(glob.escape(output_dir), "**", "*.html*"), recursive=True):
+        if filename not in kept:
+            os.remove(filename)
+            removed.append(os.path.relpath(filename, output_dir))
+    for directory, _dirnames, _filenames in os.walk(output_dir, topdown=False):
+        if directory != output_dir and not os.listdir(directory):
+            os.rmdir(directory)
+    return removed
@@ -0,0 +1,108 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Known crawlers, served cached responses instead of running the view.
+CRAWLER_USER_AGENT_RE = re.compile(
+    r"bot\b|bot/|crawl|spider|slurp|facebookexternalhit|mediapartners|ia_archiver|bingpreview", re.IGNORECASE
+)
+
+
+def is_crawler(request):
+    return bool(CRAWLER_USER_AGENT_RE.search(request.META.get("HTTP_USER_AGENT", "")))
+
+
+def get_client_ip(request):
+    """
+    The client IP, as seen by the last of the SEARCH_RATE_LIMIT_PROXIES trusted
+    proxies appending it to X-Forwarded-For. The entries before it can be forged.
+    """
+    forwarded_for = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+    if settings.SEARCH_RATE_LIMIT_PROXIES and len(forwarded_for) >= settings.SEARCH_RATE_LIMIT_PROXIES:
+        return forwarded_for[-settings.SEARCH_RATE_LIMIT_PROXIES]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def refill(state, rate, burst, now):
+    """
+    Refill a token bucket holding up to burst tokens at rate tokens per second,
+    and take a token. Return the new state and the seconds to wait for a
+    token, 0 if one was taken.
+    """
+    tokens, updated_at = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """The token buckets of this process, the least recently used are forgotten."""
+
+    def __init__(self, max_buckets=10000):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.buckets[key], wait = refill(self.buckets.get(key), rate, burst, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets shared by all processes through a cache. Concurrent
+    requests may both take the last token: the limit is approximate.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        key = f"ratelimit:{key}"
+        state, wait = refill(self.cache.get(key), rate, burst, now)
+        # Forgotten once the bucket is full again.
+        self.cache.set(key, state, math.ceil(burst / rate) + 1)
+        return wait
+
+
+MEMORY_STORE = MemoryBucketStore()
+
+
+def get_bucket_store():
+    """The store selected by the SEARCH_RATE_LIMIT_CACHE setting, this process memory by default."""
+    if settings.SEARCH_RATE_LIMIT_CACHE:
+        return CacheBucketStore(caches[settings.SEARCH_RATE_LIMIT_CACHE])
+    return MEMORY_STORE
+
+
+def take_token(request):
+    """
+    Take a token from the bucket of the client IP, then from the global
+    bucket. Return the seconds to wait before retrying, 0 if allowed.
+    """
+    store = get_bucket_store()
+    buckets = [
+        (f"ip:{get_client_ip(request)}", settings.SEARCH_RATE_LIMIT_PER_IP, settings.SEARCH_RATE_LIMIT_PER_IP_BURST),
+        ("global", settings.SEARCH_RATE_LIMIT_GLOBAL, settings.SEARCH_RATE_LIMIT_GLOBAL_BURST),
+    ]
+    for key, rate, burst in buckets:
+        if rate and (wait := store.take(key, rate, burst)):
+            return wait
+    return 0
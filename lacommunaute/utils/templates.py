@@ -0,0 +1,33 @@
+import logging
+import pathlib
+
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_templates():
+    """
+    Compile every project template when the worker starts, so that the first
+    requests don't pay for reading and compiling them.
+    Does nothing when the cached template loader is not enabled.
+    """
+    engine = engines["django"].engine
+    if not any(isinstance(loader, CachedLoader) for loader in engine.template_loaders):
+        return
+
+    count = 0
+    for templates_dir in map(pathlib.Path, engine.dirs):
+        for path in sorted(templates_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            template_name = path.relative_to(templates_dir).as_posix()
+            try:
+                engine.get_template(template_name)
+            except TemplateSyntaxError:
+                logger.exception("Unable to compile template %s", template_name)
+            else:
+                count += 1
+    logger.info("%d templates compiled", count)
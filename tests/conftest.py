@@ -1,5 +1,9 @@
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
+from django.urls import reverse
+
+from lacommunaute.utils.ratelimit import MEMORY_STORE
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -11,3 +15,14 @@ def run_compress(django_db_setup, django_db_blocker):
 @pytest.fixture(scope="function")
 def unittest_compatibility(request, snapshot):
     request.instance.snapshot = snapshot
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    MEMORY_STORE.clear()
+
+
+@pytest.fixture(name="search_url")
+def search_url_fixture():
+    return reverse("search:index")
@@ -1,5 +1,18 @@
+import pytest
 from django.urls import reverse
+from django.utils.http import http_date
 
+from lacommunaute.documentation.helpers import (
+    CARDS,
+    CARDS_BY_PARTNER,
+    CARDS_BY_TAG,
+    CATEGORIES,
+    CATEGORIES_BY_SLUG,
+    TAGS_BY_CATEGORY,
+    get_cards,
+    get_last_modified,
+)
+from lacommunaute.utils import page_cache
 from tests.testing import parse_response_to_soup
 
 
@@ -21,3 +34,88 @@ def test_card(client, db, snapshot):
     url = reverse("documentation:card", args=("les-certificats-cléa",))
     response = client.get(url)
     assert str(parse_response_to_soup(response, "#main")) == snapshot
+
+
+def test_content_indexes():
+    for category in CATEGORIES:
+        cards = [card for card in CARDS.values() if card["category_slug"] == category["slug"]]
+        assert list(get_cards(category["slug"])) == cards
+        assert CATEGORIES_BY_SLUG[category["slug"]] is category
+
+        tags = {tag["slug"]: tag for card in cards for tag in card["tags"] or []}
+        assert [tag["slug"] for tag in TAGS_BY_CATEGORY.get(category["slug"], ())] == list(tags)
+        for tag_slug in tags:
+            assert list(get_cards(category["slug"], tag_slug)) == [
+                card for card in cards if tag_slug in {tag["slug"] for tag in card["tags"] or []}
+            ]
+
+    for card in CARDS.values():
+        if card["partner"]:
+            assert card in CARDS_BY_PARTNER[card["partner"]]
+        for tag in card["tags"] or []:
+            assert card in CARDS_BY_TAG[tag["slug"]]
+
+    assert get_cards("unknown") == ()
+    assert get_cards("les-bases-de-liae", "unknown") == ()
+
+
+def test_unknown_category(client, db):
+    response = client.get(reverse("documentation:category", args=("unknown",)))
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("page_cache_timeout", [86400, 0])
+def test_card_conditional_get(client, db, settings, page_cache_timeout):
+    settings.PAGE_CACHE_TIMEOUT = page_cache_timeout
+    url = reverse("documentation:card", args=("les-certificats-cléa",))
+    response = client.get(url)
+    assert response.status_code == 200
+    last_modified = http_date(get_last_modified(get_cards(CARDS["les-certificats-cléa"]["category_slug"])).timestamp())
+    assert response["Last-Modified"] == last_modified
+    assert response["ETag"] == f'"{page_cache.content_version()}-page"'
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+    assert not response.templates
+    assert not response.content
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+
+    # The htmx partials have their own ETag.
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], HTTP_HX_REQUEST="true")
+    assert response.status_code == 200
+
+
+def test_conditional_get_after_a_deployment(client, db, monkeypatch):
+    url = reverse("documentation:category", args=("les-bases-de-liae",))
+    etag = client.get(url)["ETag"]
+    assert client.get(url, {"tag": "les-emplois"})["Last-Modified"] != client.get(url)["Last-Modified"]
+    monkeypatch.setattr(page_cache, "content_version", lambda: "new-version")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] == '"new-version-page"'
+
+
+@pytest.mark.parametrize("page_cache_timeout", [86400, 0])
+def test_conditional_get_without_csrf_cookie(client, db, settings, page_cache_timeout):
+    settings.PAGE_CACHE_TIMEOUT = page_cache_timeout
+    url = reverse("documentation:category", args=("les-bases-de-liae",))
+    response = client.get(url)
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+
+    # The page kept by the browser has a token for a cookie it no longer has: a new one is sent.
+    client.cookies.pop(settings.CSRF_COOKIE_NAME)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 200
+    assert response["ETag"] == etag
+    assert settings.CSRF_COOKIE_NAME in response.cookies
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_conditional_get_nonce_mode(client, db, settings):
+    settings.CSP_MODE = "nonce"
+    response = client.get(reverse("documentation:index"))
+    assert not response.has_header("ETag")
+    assert not response.has_header("Last-Modified")
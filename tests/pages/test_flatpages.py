@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.redirects.models import Redirect
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.test import override_settings
+from pytest_django.asserts import assertContains, assertRedirects
+
+
+@pytest.fixture(name="site")
+def site_fixture(db):
+    return Site.objects.get_current()
+
+
+def test_flatpage(client, site, django_assert_num_queries):
+    flatpage = FlatPage.objects.create(url="/qui-sommes-nous/", title="Qui sommes-nous ?", content="<p>Nous</p>")
+    flatpage.sites.add(site)
+    assertContains(client.get("/qui-sommes-nous/"), "<p>Nous</p>")
+
+    # Answered from the snapshot.
+    with django_assert_num_queries(0):
+        assertContains(client.get("/qui-sommes-nous/"), "<p>Nous</p>")
+        assert client.get("/wp-admin/").status_code == 404
+        assert client.get("/wp-content/plugins/").status_code == 404
+
+    flatpage.content = "<p>Vous</p>"
+    flatpage.save()
+    assertContains(client.get("/qui-sommes-nous/"), "<p>Vous</p>")
+    flatpage.sites.clear()
+    assert client.get("/qui-sommes-nous/").status_code == 404
+
+
+def test_redirect(client, site, django_assert_num_queries):
+    Redirect.objects.create(site=site, old_path="/ancienne-page/", new_path="/documentation/")
+    Redirect.objects.create(site=site, old_path="/page-supprimee/", new_path="")
+    assertRedirects(client.get("/ancienne-page/"), "/documentation/", status_code=301)
+
+    with django_assert_num_queries(0):
+        assertRedirects(client.get("/ancienne-page/"), "/documentation/", status_code=301)
+        assert client.get("/page-supprimee/").status_code == 410
+        assert client.get("/page-inconnue/").status_code == 404
+
+    Redirect.objects.filter(old_path="/ancienne-page/").delete()
+    assert client.get("/ancienne-page/").status_code == 404
+
+
+def test_unknown_url_with_the_database_cache(client, site, django_assert_num_queries):
+    # As in production: the flatpages version is read from the in-process L1, not from the database.
+    caches = {
+        "default": {"BACKEND": "lacommunaute.utils.cache.TieredCache", "LOCATION": "database"},
+        "database": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_cache_table"},
+    }
+    with override_settings(CACHES=caches):
+        call_command("createcachetable", "--database", "default")
+        assert client.get("/wp-admin/").status_code == 404
+
+        with django_assert_num_queries(0):
+            assert client.get("/wp-admin/").status_code == 404
+            assert client.get("/.env/").status_code == 404
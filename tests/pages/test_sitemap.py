@@ -1,5 +1,9 @@
+from django.contrib.flatpages.models import FlatPage
+from django.contrib.sites.models import Site
 from django.urls import reverse
 
+from lacommunaute.documentation.helpers import CARDS
+
 
 def test_sitemap(client, db, snapshot):
     url = reverse("pages:django.contrib.sitemaps.views.sitemap")
@@ -8,3 +12,35 @@ def test_sitemap(client, db, snapshot):
     assert response["Content-Type"] == "application/xml"
     assert "sitemap.xml" in response.templates[0].name
     assert response.content.decode() == snapshot
+
+
+def test_sitemap_is_cached(client, db, django_assert_num_queries):
+    url = reverse("pages:django.contrib.sitemaps.views.sitemap")
+    response = client.get(url)
+    with django_assert_num_queries(0):
+        cached = client.get(url)
+    assert not cached.templates
+    assert cached.content == response.content
+    assert cached["ETag"] == response["ETag"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    flatpage = FlatPage.objects.create(url="/qui-sommes-nous/", title="Qui sommes-nous ?")
+    flatpage.sites.add(Site.objects.get_current())
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 200
+    assert "/qui-sommes-nous/</loc>" in response.content.decode()
+
+
+def test_sitemap_index(client, db, settings):
+    settings.SITEMAP_LIMIT = 100
+    response = client.get(reverse("pages:django.contrib.sitemaps.views.sitemap"))
+    assert "sitemap_index.xml" in response.templates[0].name
+    content = response.content.decode()
+    assert "<loc>http://example.com/sitemap-card.xml</loc>" in content
+    assert "<loc>http://example.com/sitemap-card.xml?p=2</loc>" in content
+    assert "<loc>http://example.com/sitemap-pages.xml</loc>" in content
+
+    response = client.get(reverse("pages:sitemap_section", args=("card",)), {"p": 2})
+    assert response.status_code == 200
+    assert response.content.decode().count("<url>") == len(CARDS) - 100
+    assert client.get(reverse("pages:sitemap_section", args=("unknown",))).status_code == 404
@@ -21,3 +21,16 @@ def test_listview(client, db, snapshot):
     response = client.get(reverse("partner:list"))
     assert response.status_code == 200
     assert str(parse_response_to_soup(response, selector="#partner-list", replace_img_src=True)) == snapshot
+
+
+def test_detailview_conditional_get(client, db):
+    url = reverse("partner:detail", args=("1-jeune-1-solution",))
+    response = client.get(url)
+    assert response.has_header("Last-Modified")
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+    response = client.get(reverse("partner:list"))
+    assert not response.has_header("Last-Modified")
+    response = client.get(reverse("partner:list"), HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
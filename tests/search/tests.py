@@ -1,14 +1,24 @@
+import io
+import itertools
+import json
 import urllib.parse
 
 import pytest
 from django.core.management import call_command
 from django.urls import reverse
+from django.utils.html import escape
 from pytest_django.asserts import assertContains, assertNotContains
 
-
-@pytest.fixture(name="search_url")
-def search_url_fixture():
-    return reverse("search:index")
+from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.partner.helpers import PARTNERS
+from lacommunaute.search import helpers as search_helpers
+from lacommunaute.search.backends import MemorySearchBackend, PostgresSearchBackend
+from lacommunaute.search.benchmark import QUERIES, generate_cards
+from lacommunaute.search.executor import CursorPage, SearchExecutor, encode_cursor
+from lacommunaute.search.models import CommonIndex, IndexVersion
+from lacommunaute.search.static_index import build_static_index, get_static_index_url
+from lacommunaute.search.suggestions import Suggestion, SuggestionIndex, fold
+from lacommunaute.search.text import is_empty_query, limit_terms, normalize_query
 
 
 @pytest.fixture(autouse=1)
@@ -55,3 +65,532 @@ def test_pagination_perserves_get_params(client, db, search_url):
         f'<a href="{search_url}?q=IAE&amp;page=2" class="page-link">2</a>',
         count=1,
     )
+
+
+def test_rebuild_index_is_incremental(db, monkeypatch):
+    indexed = {index.card_slug: index for index in CommonIndex.objects.exclude(card_slug="")}
+    assert len(indexed) == len(CARDS)
+
+    stdout = io.StringIO()
+    call_command("rebuild_index", stdout=stdout)
+    assert stdout.getvalue() == "Indices already up to date.\n"
+
+    [updated_slug, removed_slug, *_] = CARDS
+    cards = {**CARDS, updated_slug: {**CARDS[updated_slug], "description": "Nouvelle description"}}
+    del cards[removed_slug]
+    monkeypatch.setattr(search_helpers, "CARDS", cards)
+    stdout = io.StringIO()
+    call_command("rebuild_index", stdout=stdout)
+    assert stdout.getvalue() == "Indices refreshed! 1 created or updated, 1 removed.\n"
+
+    assert not CommonIndex.objects.filter(card_slug=removed_slug).exists()
+    updated = CommonIndex.objects.get(card_slug=updated_slug)
+    assert updated.pk == indexed[updated_slug].pk
+    assert "Nouvelle description" in updated.content
+    assert updated.content_hash != indexed[updated_slug].content_hash
+    for index in CommonIndex.objects.exclude(card_slug__in=["", updated_slug]):
+        assert index.content_hash == indexed[index.card_slug].content_hash
+
+    monkeypatch.undo()
+    stdout = io.StringIO()
+    call_command("rebuild_index", stdout=stdout)
+    assert stdout.getvalue() == "Indices refreshed! 2 created or updated, 0 removed.\n"
+    assert CommonIndex.objects.count() == len(CARDS) + len(CATEGORIES)
+
+
+def test_content_ts_is_generated(db):
+    index = CommonIndex.objects.create(
+        title="Les emplois",
+        content="Contrats aidés",
+        content_hash="hash",
+        category_slug="category",
+        card_slug="card",
+    )
+    index.refresh_from_db()
+    assert index.content_ts == "'aid':4B 'contrat':3B 'emplois':2A 'le':1A"
+
+
+def test_search_queries(client, db, search_url, django_assert_num_queries):
+    matches = SearchExecutor("emploi").matches()
+    count = matches.count()
+    assert count > 20
+
+    # ATOMIC_REQUESTS savepoint, index generation, ranked ids, headlines of the page, savepoint release.
+    # Ranking and headlines each run in a savepoint, setting the statement timeout and rolled back.
+    with django_assert_num_queries(5 + 2 * 4):
+        response = client.get(search_url, {"q": "emploi", "page": 2})
+    assert response.context["paginator"].count == count
+    page = response.context["page_obj"]
+    expected = list(matches.order_by("-rank", "pk").values_list("pk", flat=True)[10:20])
+    assert [result.pk for result in page.object_list] == expected
+    assert all(result.headline for result in page.object_list)
+
+    # Cached, for equivalent queries too.
+    with django_assert_num_queries(2):
+        response = client.get(search_url, {"q": " EMPLOI  ", "page": 2})
+    assert [result.pk for result in response.context["page_obj"].object_list] == expected
+
+    # Another page of the same query only needs the headlines.
+    with django_assert_num_queries(3 + 4):
+        response = client.get(search_url, {"q": "emploi", "page": 3})
+
+
+def test_search_cache_is_invalidated_by_rebuild_index(
+    client, db, search_url, monkeypatch, django_capture_on_commit_callbacks
+):
+    response = client.get(search_url, {"q": "anticonstitutionnellement"})
+    assert response.context["paginator"].count == 0
+
+    [slug, *_] = CARDS
+    cards = {**CARDS, slug: {**CARDS[slug], "description": "anticonstitutionnellement"}}
+    monkeypatch.setattr(search_helpers, "CARDS", cards)
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("rebuild_index")
+
+    response = client.get(search_url, {"q": "anticonstitutionnellement"})
+    assert response.context["paginator"].count == 1
+
+
+def test_search_only_stop_words(client, db, search_url, django_assert_num_queries):
+    with django_assert_num_queries(2):
+        response = client.get(search_url, {"q": "le la OR des"})
+    assertContains(response, "Aucun résultat")
+
+
+def test_search_ignores_extra_terms(client, db, search_url, settings):
+    settings.SEARCH_MAX_TERMS = 2
+    response = client.get(search_url, {"q": "retour emploi anticonstitutionnellement"})
+    assert response.context["paginator"].count == SearchExecutor("retour emploi").count() > 0
+
+    # Words joined by punctuation are counted as the search splits them.
+    response = client.get(search_url, {"q": "emploi,formation,anticonstitutionnellement"})
+    assert response.context["paginator"].count == SearchExecutor("emploi,formation").count() > 0
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("retour emploi", "retour emploi"),
+        ("retour  emploi logement", "retour  emploi "),
+        ("retour,emploi,logement", "retour,emploi,"),
+        ("a-b-c-d", "a-b-"),
+        ('"retour à l\'emploi" logement', '"retour à '),
+    ],
+)
+def test_limit_terms(query, expected):
+    assert limit_terms(query, 2) == expected
+
+
+def slow(queryset):
+    return queryset.extra(where=["(SELECT true FROM pg_sleep(0.2))"])
+
+
+def test_search_ranking_timeout(client, db, search_url, settings, monkeypatch, caplog):
+    settings.SEARCH_STATEMENT_TIMEOUT = 50
+    matches = SearchExecutor.matches
+    monkeypatch.setattr(SearchExecutor, "matches", lambda self: slow(matches(self)))
+
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.status_code == 200
+    results = response.context["page_obj"].object_list
+    assert results
+    assert all("emploi" in result.title.casefold() for result in results)
+    assert all(result.headline for result in results)
+    assert caplog.messages == ["Search ranking timed out for 'emploi' in None, ranking title matches"]
+
+    title_matches = SearchExecutor.title_matches
+    monkeypatch.setattr(SearchExecutor, "title_matches", lambda self: slow(title_matches(self)))
+    caplog.clear()
+    response = client.get(search_url, {"q": "formation"})
+    assertContains(response, "Aucun résultat")
+    assert caplog.messages == [
+        "Search ranking timed out for 'formation' in None, ranking title matches",
+        "Search title ranking timed out for 'formation' in None, no results",
+    ]
+
+
+def test_search_headlines_timeout(client, db, search_url, settings, monkeypatch, caplog):
+    settings.SEARCH_STATEMENT_TIMEOUT = 50
+    with_headlines = SearchExecutor.with_headlines
+    monkeypatch.setattr(SearchExecutor, "with_headlines", lambda self, docs: slow(with_headlines(self, docs)))
+
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.status_code == 200
+    results = response.context["page_obj"].object_list
+    assert len(results) == 10
+    assert not any(result.headline for result in results)
+    assert caplog.messages == ["Search headlines timed out for 'emploi' in None, leaving them out"]
+
+
+def test_search_result_removed_after_ranking(client, db, search_url):
+    executor = SearchExecutor("emploi")
+    [(pk, _rank, _category_slug), *_] = executor.ranking()
+    # Removed by rebuild_index, while the ranking is still cached.
+    CommonIndex.objects.filter(pk=pk).delete()
+
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.status_code == 200
+    results = response.context["page_obj"].object_list
+    assert len(results) == 9
+    assert pk not in [result.pk for result in results]
+
+
+def test_search_page_out_of_range(client, db, search_url):
+    response = client.get(search_url, {"q": "emploi", "page": 1000})
+    assert response.status_code == 404
+    response = client.get(search_url, {"q": "emploi", "page": "last"})
+    assert response.status_code == 200
+
+
+def test_search_reranks_candidates_only(client, db, search_url, settings):
+    settings.SEARCH_CANDIDATES = 3
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.context["paginator"].count == 3
+
+
+def test_search_title_boost(db, settings):
+    settings.SEARCH_TITLE_BOOST = 10
+    [first, *_] = SearchExecutor("handicap").fetch(0, 10)
+    assert "handicap" in first.title.lower()
+
+
+def test_benchmark_ranking(db):
+    stdout = io.StringIO()
+    call_command("benchmark_ranking", "emploi", repeat=1, stdout=stdout)
+    [_header, _columns, result] = stdout.getvalue().splitlines()
+    assert result.startswith("emploi ")
+    assert result.endswith("100%         yes")
+
+
+@pytest.mark.parametrize(
+    "query,normalized,empty",
+    [
+        ("Emploi", "emploi", False),
+        ("  contrats   AIDÉS ", "contrats aidés", False),
+        ("le la des", "le la des", True),
+        ("de OR à", "de or à", True),
+        ('"l\'" -de', '"l\'" -de', True),
+        ("", "", True),
+        ("les", "les", False),
+    ],
+)
+def test_normalize_query(query, normalized, empty):
+    assert normalize_query(query) == normalized
+    assert is_empty_query(normalized) is empty
+
+
+@pytest.fixture(name="memory_backend")
+def memory_backend_fixture(settings):
+    settings.SEARCH_BACKEND = "lacommunaute.search.backends.MemorySearchBackend"
+
+
+def found(results):
+    return {(result.category_slug, result.card_slug) for result in results.fetch(0, results.count())}
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["emploi", "handicap", "IAE", "Contrats", '"freins périphériques"', '"aide à la mobilité"', "emploi or handicap"],
+)
+def test_search_backends_match_the_same_documents(db, query):
+    assert found(MemorySearchBackend().search(query)) == found(PostgresSearchBackend().search(query))
+
+
+@pytest.mark.parametrize("query", ["insertion professionnelle", "aides à la mobilité"])
+def test_memory_backend_does_not_filter_low_ranks(db, query):
+    # Documents where the words are far apart are below the Postgres rank threshold.
+    assert found(MemorySearchBackend().search(query)) >= found(PostgresSearchBackend().search(query))
+
+
+def test_memory_backend_excluded_words(db):
+    backend = MemorySearchBackend()
+    excluded = found(backend.search("emploi -handicap"))
+    assert excluded
+    assert excluded == found(backend.search("emploi")) - found(backend.search("handicap"))
+
+
+def test_search_with_memory_backend(client, db, search_url, memory_backend, django_assert_num_queries):
+    # ATOMIC_REQUESTS savepoint and release.
+    with django_assert_num_queries(2):
+        response = client.get(search_url, {"q": "Tout savoir sur"})
+    assertContains(response, '<span class="highlighted">Tout</span>')
+    assertContains(response, '<span class="highlighted">savoir</span>')
+    assertNotContains(response, '<span class="highlighted">sur</span>')
+
+    response = client.get(search_url, {"q": "anticonstitutionnellement"})
+    assertContains(response, "Aucun résultat")
+    response = client.get(search_url, {"q": "le la OR des"})
+    assertContains(response, "Aucun résultat")
+
+
+def test_memory_backend_ranking(db, settings):
+    settings.SEARCH_TITLE_BOOST = 10
+    [first, *_] = MemorySearchBackend().search("handicap").fetch(0, 10)
+    assert "handicap" in first.title.lower()
+    assert first.rank > 0
+
+
+def test_memory_backend_headline_is_escaped():
+    backend = MemorySearchBackend()
+    backend.add(
+        {"category_slug": "", "card_slug": "card", "title": "Titre", "content": "<b>Emploi</b> & emploi inclusif"}
+    )
+    [result] = [result for result in backend.search("emploi").fetch(0, 1000) if result.card_slug == "card"]
+    assert result.headline == (
+        '<span class="highlighted">Emploi</span>&lt;/b&gt; &amp; <span class="highlighted">emploi</span> inclusif'
+    )
+
+
+def test_generate_cards():
+    cards = generate_cards(50, seed=1)
+    assert len(cards) == 50
+    assert all(card.keys() == next(iter(CARDS.values())).keys() for card in cards.values())
+    assert all(card["content"] for card in cards.values())
+    assert generate_cards(50, seed=1) == cards
+    assert generate_cards(50, seed=2) != cards
+
+
+def test_benchmark_search(db, tmp_path):
+    indexed = set(CommonIndex.objects.values_list("pk", "content_hash"))
+    output = tmp_path / "benchmark.json"
+    call_command("benchmark_search", documents=[20], repeat=2, output=output)
+
+    [run] = json.loads(output.read_text())["runs"]
+    assert run["documents"] == 20
+    assert run["rebuild_index_seconds"].keys() == {"full", "unchanged", "incremental"}
+    for backend in ["postgres", "memory"]:
+        latencies = run["search_latency_ms"][backend]
+        assert latencies.keys() == QUERIES.keys()
+        assert latencies["word"]["warm"]["count"] == 2 * len(QUERIES["word"])
+    # Nothing is written to the database.
+    assert set(CommonIndex.objects.values_list("pk", "content_hash")) == indexed
+
+
+def test_refresh_index_streams_documents_by_batches(db):
+    [updated, removed, *kept] = search_helpers.get_documents()
+    updated = {**updated, "title": "Nouveau titre", "content_hash": "changed"}
+    documents = [*kept, updated]
+
+    assert search_helpers.refresh_index(lambda: (document for document in documents), batch_size=7) == (1, 1)
+    assert CommonIndex.objects.count() == len(documents)
+    assert CommonIndex.objects.get(category_slug=updated["category_slug"], card_slug="").title == "Nouveau titre"
+    assert not CommonIndex.objects.filter(category_slug=removed["category_slug"], card_slug="").exists()
+
+    # The fingerprint doesn't depend on the order of the documents. They are streamed once, and not staged.
+    calls = []
+
+    def get_documents():
+        calls.append(True)
+        return reversed(documents)
+
+    assert search_helpers.refresh_index(get_documents, batch_size=50) is None
+    assert len(calls) == 1
+
+
+def test_refresh_index_keeps_the_last_duplicate(db):
+    [first, *documents] = search_helpers.get_documents()
+    duplicates = [{**first, "title": title, "content_hash": title} for title in ["Premier", "Second"]]
+
+    # Across batches, and within a batch.
+    for batch_size in [1, 1000]:
+        IndexVersion.objects.update(fingerprint="")
+        search_helpers.refresh_index(lambda: [*duplicates, *documents, {**first, "content_hash": "last"}], batch_size)
+        assert CommonIndex.objects.get(category_slug=first["category_slug"], card_slug="").content_hash == "last"
+        assert CommonIndex.objects.count() == len(documents) + 1
+
+
+def test_suggestions(client, django_assert_num_queries):
+    url = reverse("search:suggestions")
+    # Answered from memory, without any query.
+    with django_assert_num_queries(0):
+        response = client.get(url, {"q": "  MOBILITE"})
+    assertContains(response, "mobilité")
+    assert all("mobilit" in fold(suggestion.name) for suggestion in response.context["suggestions"])
+    assert len(response.context["suggestions"]) <= 8
+
+    [partner, *_] = PARTNERS.values()
+    response = client.get(url, {"q": partner["name"]})
+    assertContains(response, reverse("partner:detail", args=[partner["slug"]]))
+
+    response = client.get(url, {"q": ""})
+    assert response.content.strip() == b""
+    response = client.get(url, {"q": "anticonstitutionnellement"})
+    assert response.content.strip() == b""
+
+
+def test_suggestion_index():
+    index = SuggestionIndex(
+        [
+            Suggestion("card", "aides", "Les aides à la mobilité"),
+            Suggestion("card", "mobilite", "Mobilité et logement"),
+            Suggestion("category", "emploi", "Emploi"),
+        ]
+    )
+    assert [suggestion.slug for suggestion in index.suggest("mobi")] == ["aides", "mobilite"]
+    assert [suggestion.slug for suggestion in index.suggest("aides a la")] == ["aides"]
+    assert [suggestion.slug for suggestion in index.suggest("mobi", limit=1)] == ["aides"]
+    assert index.suggest("emplois") == []
+
+
+def test_search_htmx_partial(client, db, search_url):
+    response = client.get(search_url, {"q": "emploi", "page": 2}, headers={"HX-Request": "true"})
+    assert response.templates[0].name == "search/partials/results.html"
+    assertNotContains(response, "<html")
+    assertContains(response, '<div id="search_results">')
+    assertContains(response, '<span class="highlighted">')
+    assertContains(response, 'hx-boost="true" hx-target="#search_results"')
+    assert "HX-Request" in response.headers["Vary"]
+
+    # History restoration and regular requests get the full page.
+    response = client.get(
+        search_url, {"q": "emploi"}, headers={"HX-Request": "true", "HX-History-Restore-Request": "true"}
+    )
+    assert response.templates[0].name == "search/results.html"
+    response = client.get(search_url, {"q": "emploi"})
+    assertContains(response, "<html")
+    assertContains(response, 'hx-target="#search_results"', count=2)
+    assert "HX-Request" in response.headers["Vary"]
+
+
+@pytest.mark.parametrize("memory", [False, True])
+def test_search_cursor_pagination(client, db, search_url, settings, memory):
+    settings.SEARCH_CURSOR_PAGINATION = True
+    if memory:
+        settings.SEARCH_BACKEND = "lacommunaute.search.backends.MemorySearchBackend"
+    response = client.get(search_url, {"q": "emploi"})
+    count = response.context["result_count"]
+    assert count > 20
+    assertContains(response, f"{count} résultats")
+    assertContains(response, "Voir plus de résultats")
+
+    seen = [(result.category_slug, result.card_slug) for result in response.context["page_obj"].object_list]
+    cursor = response.context["page_obj"].next_cursor
+    while cursor:
+        response = client.get(search_url, {"q": "emploi", "cursor": cursor}, headers={"HX-Request": "true"})
+        assert response.templates[0].name == "search/partials/result_rows.html"
+        assertNotContains(response, "<table")
+        page = response.context["page_obj"]
+        seen.extend((result.category_slug, result.card_slug) for result in page.object_list)
+        cursor = page.next_cursor
+    assertNotContains(response, "Voir plus de résultats")
+    assert len(seen) == len(set(seen)) == count
+
+    response = client.get(search_url, {"q": "emploi", "cursor": "invalide"})
+    assert response.status_code == 404
+
+
+def test_search_cursor_pagination_capped_count(client, db, search_url, settings):
+    settings.SEARCH_CURSOR_PAGINATION = True
+    settings.SEARCH_BACKEND = "lacommunaute.search.backends.MemorySearchBackend"
+    settings.SEARCH_CANDIDATES = 20
+    response = client.get(search_url, {"q": "emploi"})
+    assertContains(response, "20+ résultats")
+
+
+def test_search_capped_count(client, db, search_url, settings):
+    settings.SEARCH_CANDIDATES = 5
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.context["result_count"] == 5
+    assertContains(response, "5+ résultats")
+
+    settings.SEARCH_BACKEND = "lacommunaute.search.backends.MemorySearchBackend"
+    response = client.get(search_url, {"q": "emploi"})
+    assert not response.context["result_count_capped"]
+    assertContains(response, f"{response.context['result_count']} résultats")
+
+
+def test_cursor_resumes_after_a_vanished_result():
+    ranking = [("a", 3.0, "x"), ("b", 2.0, "x"), ("c", 2.0, "y"), ("d", 1.0, "x")]
+    assert CursorPage.offset_after(ranking, encode_cursor("b", 2.0)) == 2
+    assert CursorPage.offset_after(ranking, encode_cursor("x", 2.5)) == 1
+    assert CursorPage.offset_after(ranking, encode_cursor("x", 0.5)) == 4
+
+
+@pytest.mark.parametrize("memory", [False, True])
+def test_search_in_category(client, db, search_url, settings, memory):
+    if memory:
+        settings.SEARCH_BACKEND = "lacommunaute.search.backends.MemorySearchBackend"
+    response = client.get(search_url, {"q": "emploi"})
+    category_counts = response.context["category_counts"]
+    assert sum(count for _category, count in category_counts) == response.context["result_count"]
+    [(category, count), *_] = category_counts
+    assertContains(response, f"{escape(category['name'])} ({count})")
+
+    response = client.get(search_url, {"q": "emploi", "category": category["slug"]})
+    assert response.context["category"] == category
+    assert response.context["result_count"] == count
+    assert "category_counts" not in response.context
+    assertContains(response, "Recherche dans la thématique")
+    assertContains(response, 'name="category" value="{}"'.format(category["slug"]))
+    for result in response.context["page_obj"].object_list:
+        assert result.category_slug == category["slug"]
+        assert not result.card_slug or CARDS[result.card_slug]["category_slug"] == category["slug"]
+
+
+def test_search_in_category_capped_count(client, db, search_url, settings):
+    settings.SEARCH_CANDIDATES = 5
+    response = client.get(search_url, {"q": "emploi"})
+    # The least found category: ranked within it, more documents are found.
+    [*_, (category, count)] = response.context["category_counts"]
+    assertContains(response, f"{escape(category['name'])} ({count}+)")
+    response = client.get(search_url, {"q": "emploi", "category": category["slug"]})
+    assert response.context["result_count"] > count
+    assertContains(response, f"{response.context['result_count']}+ résultats")
+
+
+def test_search_in_unknown_category(client, db, search_url):
+    response = client.get(search_url, {"q": "emploi", "category": "inconnue"})
+    assertContains(response, "Aucun résultat")
+
+
+def test_static_index_matches_memory_backend(db):
+    documents = list(search_helpers.get_documents())
+    index = build_static_index(documents)
+    backend = MemorySearchBackend(documents)
+    assert len(index["documents"]) == len(documents)
+
+    for query in ["emploi", "aide mobilité", "retour emploi"]:
+        stems = {index["words"][word] for word in query.split()}
+        [first, *others] = stems
+        scores = dict(itertools.batched(index["postings"][first], 2))
+        for stem in others:
+            postings = dict(itertools.batched(index["postings"][stem], 2))
+            scores = {
+                document: score + postings[document] for document, score in scores.items() if document in postings
+            }
+        expected = [
+            (document, round(score * 100)) for document, score, _category_slug in backend.search(query).ranking()
+        ]
+        assert sorted(scores) == sorted(document for document, _score in expected)
+        for document, score in expected:
+            assert abs(scores[document] - score) <= len(stems)
+
+    card = next(document for document in documents if document["card_slug"])
+    assert [card["title"], f"/documentation/card/{card['card_slug']}", card["category_slug"]] in [
+        [title, urllib.parse.unquote(url), category_slug] for title, url, category_slug in index["documents"]
+    ]
+    assert "le" in index["stopwords"] and "le" not in index["words"]
+
+
+def test_build_search_index(client, db, search_url, settings, tmp_path):
+    settings.STATICFILES_DIRS = [tmp_path]
+    get_static_index_url.cache_clear()
+    response = client.get(search_url)
+    assertNotContains(response, "data-search-index")
+    assertNotContains(response, "javascripts/search.js")
+
+    stale = tmp_path / "search" / "index.0123456789ab.json"
+    stale.parent.mkdir()
+    stale.write_text("{}")
+    stdout = io.StringIO()
+    call_command("build_search_index", stdout=stdout)
+    [path] = (tmp_path / "search").iterdir()
+    assert path.name != stale.name
+    index = json.loads(path.read_text())
+    assert index["version"] == 1
+    assert stdout.getvalue().startswith(f"Search index written to {tmp_path}/search/{path.name}:")
+
+    response = client.get(search_url)
+    assertContains(response, f'data-search-index="/static/search/{path.name}"')
+    assertContains(response, "javascripts/search.js")
+    get_static_index_url.cache_clear()
@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from lacommunaute.utils.cache import TieredCache, get_or_compute
+
+
+LOCMEM = "django.core.cache.backends.locmem.LocMemCache"
+
+
+def test_get_or_compute():
+    assert get_or_compute("key", lambda: [1], 60) == [1]
+    assert get_or_compute("key", lambda: [2], 60) == [1]
+
+
+def test_get_or_compute_coalesces_concurrent_misses():
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(get_or_compute, "key", compute, 60) for _ in range(4)]
+        results = [future.result() for future in futures]
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+
+@pytest.fixture(name="tiered_cache")
+def tiered_cache_fixture():
+    tiered_cache = TieredCache("tiered-l2", {"OPTIONS": {"MAX_ENTRIES": 2, "L1_TIMEOUT": 60, "STALE_TIMEOUT": 60}})
+    with override_settings(CACHES={**settings.CACHES, "tiered-l2": {"BACKEND": LOCMEM, "LOCATION": "tiered-l2"}}):
+        tiered_cache.clear()
+        tiered_cache.l1.stats.clear()
+        yield tiered_cache
+
+
+def test_tiered_cache(tiered_cache):
+    tiered_cache.set("key", "value")
+    assert tiered_cache.get("key") == "value"
+    # Written by another process, seen once the L1 entry expires.
+    tiered_cache.l2.set("key", ("other value", None))
+    assert tiered_cache.get("key") == "value"
+    tiered_cache.l1.clear()
+    assert tiered_cache.get("key") == "other value"
+    assert tiered_cache.get("missing", "default") == "default"
+    assert tiered_cache.stats() == {"l1_hits": 2, "l2_hits": 1, "stale_hits": 0, "misses": 1}
+
+    assert not tiered_cache.add("key", "new value")
+    assert tiered_cache.add("new_key", "new value")
+    assert tiered_cache.get("new_key") == "new value"
+    assert tiered_cache.add("counter", 1)
+    assert tiered_cache.incr("counter", 2) == 3
+    assert tiered_cache.get("counter") == 3
+
+    tiered_cache.delete("key")
+    assert tiered_cache.get("key") is None
+    tiered_cache.set("key", "value", 0)
+    assert tiered_cache.get("key") is None
+
+
+def test_tiered_cache_evicts_least_recently_used(tiered_cache):
+    for key in ["a", "b", "c"]:
+        tiered_cache.set(key, key)
+    assert list(tiered_cache.l1.entries) == [tiered_cache.make_key("b"), tiered_cache.make_key("c")]
+    # Still in L2.
+    assert tiered_cache.get("a") == "a"
+
+
+def test_tiered_cache_serves_stale_values_while_revalidating(tiered_cache, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    tiered_cache.set("key", "value", 10)
+    now += 20
+    assert tiered_cache.get("key") is None
+
+    # Another process is recomputing it.
+    tiered_cache.l2.add("key:lock", True)
+    assert tiered_cache.get_or_set("key", lambda: "new value", 10) == "value"
+    assert tiered_cache.stats()["stale_hits"] == 1
+
+    tiered_cache.l2.delete("key:lock")
+    assert tiered_cache.get_or_set("key", lambda: "new value", 10) == "new value"
+    assert tiered_cache.get("key") == "new value"
+
+    # Gone after the stale timeout.
+    now += 100
+    assert tiered_cache.get_or_set("key", lambda: "newer value", 10) == "newer value"
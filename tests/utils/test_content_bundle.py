@@ -0,0 +1,36 @@
+from django.core.management import call_command
+
+from lacommunaute.documentation.helpers import CARDS, CATEGORIES
+from lacommunaute.partner.helpers import PARTNERS
+from lacommunaute.utils import content_bundle
+
+
+def test_build_and_read_bundle(tmp_path):
+    path = tmp_path / "content.bundle"
+    call_command("build_content_bundle", output=path)
+
+    content = content_bundle.read_bundle(path)
+    assert content["categories"] == CATEGORIES
+    assert content["cards"] == CARDS
+    assert list(content["cards"]) == list(CARDS)
+    assert content["partners"] == PARTNERS
+    card = content["cards"]["les-certificats-cléa"]
+    assert card["html"].__html__() == CARDS["les-certificats-cléa"]["html"]
+
+
+def test_read_missing_bundle(tmp_path):
+    assert content_bundle.read_bundle(tmp_path / "content.bundle") is None
+
+
+def test_read_stale_bundle(tmp_path, monkeypatch):
+    path = tmp_path / "content.bundle"
+    call_command("build_content_bundle", output=path)
+
+    monkeypatch.setattr(content_bundle, "sources_fingerprint", lambda: "changed")
+    assert content_bundle.read_bundle(path) is None
+
+
+def test_read_corrupted_bundle(tmp_path):
+    path = tmp_path / "content.bundle"
+    path.write_bytes(b"not a bundle")
+    assert content_bundle.read_bundle(path) is None
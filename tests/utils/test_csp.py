@@ -0,0 +1,51 @@
+import re
+
+import pytest
+from django.conf import settings
+from django.http import HttpResponse
+from django.middleware.csp import ContentSecurityPolicyMiddleware
+from django.template import RequestContext, Template
+from django.urls import reverse
+
+from lacommunaute.utils.csp import DynamicInlineScript, csp_nonce, inline_script_hashes, script_hash
+
+
+def test_inline_script_hashes(tmp_path):
+    (tmp_path / "partials").mkdir()
+    (tmp_path / "partials" / "scripts.html").write_text(
+        '<script src="app.js"></script>\n'
+        '<script{% if use_csp_nonce %} nonce="{{ csp_nonce }}"{% endif %}>\n    init();\n</script>\n'
+        '<script type="application/ld+json">{"name": "{{ title }}"}</script>\n'
+    )
+    (tmp_path / "page.html").write_text("<script>init();</script><script>\n    init();\n</script>")
+    assert script_hash("init();") == "'sha256-GEnM5q1nYY/iACnyMTdov+tNp9OFcBnnDgNXUXaVNXc='"
+    assert inline_script_hashes([tmp_path]) == sorted([script_hash("\n    init();\n"), script_hash("init();")])
+
+    (tmp_path / "dynamic.html").write_text("<script>init({{ value }});</script>")
+    with pytest.raises(DynamicInlineScript, match="dynamic.html"):
+        inline_script_hashes([tmp_path])
+
+
+def test_inline_scripts_are_allowed_by_their_hash(client, db):
+    response = client.get(reverse("pages:home"))
+    inline_scripts = re.findall(r"<script>(.*?)</script>", response.content.decode(), re.DOTALL)
+    assert inline_scripts
+    for body in inline_scripts:
+        assert script_hash(body) in response["Content-Security-Policy"]
+    assert "'nonce-" not in response["Content-Security-Policy"]
+
+
+def test_csp_nonce(rf):
+    @csp_nonce
+    def view(request):
+        template = Template("<script nonce='{{ csp_nonce }}'>init();</script>")
+        return HttpResponse(template.render(RequestContext(request)))
+
+    response = ContentSecurityPolicyMiddleware(view)(rf.get("/"))
+    [nonce] = re.findall(r"nonce='([^']+)'", response.content.decode())
+    assert f"'nonce-{nonce}'" in response["Content-Security-Policy"]
+    # The hashes still allow the other inline scripts.
+    assert settings.SECURE_CSP["script-src"][-1] in response["Content-Security-Policy"]
+
+    response = ContentSecurityPolicyMiddleware(lambda request: HttpResponse())(rf.get("/"))
+    assert "'nonce-" not in response["Content-Security-Policy"]
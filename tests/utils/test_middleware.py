@@ -1,6 +1,15 @@
+import re
+
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import override_settings
-from pytest_django.asserts import assertTemplateUsed
+from django.urls import reverse
+from django.utils.csp import CSP
+from pytest_django.asserts import assertContains, assertNotContains, assertTemplateUsed
+
+from lacommunaute.utils import page_cache
+from lacommunaute.utils.ratelimit import MemoryBucketStore, is_crawler
 
 
 @pytest.mark.parametrize(
@@ -15,3 +24,179 @@ def test_parking_page_middleware(client, db, parking_page, expected_template):
         response = client.get("/")
         assert response.status_code == 200
         assertTemplateUsed(response, expected_template)
+
+
+def test_rate_limit_per_ip(client, db, settings, search_url):
+    settings.SEARCH_RATE_LIMIT_PER_IP = 0.01
+    settings.SEARCH_RATE_LIMIT_PER_IP_BURST = 2
+
+    for _ in range(2):
+        assert client.get(search_url, {"q": "emploi"}).status_code == 200
+    response = client.get(search_url, {"q": "emploi"})
+    assert response.status_code == 429
+    assert response["Retry-After"] == "100"
+
+    # Other clients and other views aren't limited.
+    assert client.get(search_url, {"q": "emploi"}, REMOTE_ADDR="10.0.0.1").status_code == 200
+    assert client.get("/").status_code == 200
+
+
+def test_rate_limit_client_ip_behind_proxy(client, db, settings, search_url):
+    settings.SEARCH_RATE_LIMIT_PER_IP = 0.01
+    settings.SEARCH_RATE_LIMIT_PER_IP_BURST = 1
+
+    assert client.get(search_url, HTTP_X_FORWARDED_FOR="1.1.1.1, 10.0.0.1").status_code == 200
+    # The first entries are forged by the client.
+    assert client.get(search_url, HTTP_X_FORWARDED_FOR="2.2.2.2, 10.0.0.1").status_code == 429
+    assert client.get(search_url, HTTP_X_FORWARDED_FOR="10.0.0.2").status_code == 200
+
+
+def test_rate_limit_global(client, db, settings, search_url):
+    settings.SEARCH_RATE_LIMIT_GLOBAL = 0.5
+    settings.SEARCH_RATE_LIMIT_GLOBAL_BURST = 1
+
+    assert client.get(search_url, REMOTE_ADDR="10.0.0.1").status_code == 200
+    response = client.get(search_url, REMOTE_ADDR="10.0.0.2")
+    assert response.status_code == 429
+    assert response["Retry-After"] == "2"
+
+
+def test_rate_limit_shared_cache(client, db, settings, search_url):
+    settings.SEARCH_RATE_LIMIT_CACHE = "shared"
+    settings.SEARCH_RATE_LIMIT_PER_IP = 0.01
+    settings.SEARCH_RATE_LIMIT_PER_IP_BURST = 1
+
+    assert client.get(search_url).status_code == 200
+    assert client.get(search_url).status_code == 429
+    cache.clear()
+    assert client.get(search_url).status_code == 200
+
+
+def test_crawlers_are_served_cached_responses(client, db, settings, search_url, django_assert_num_queries):
+    settings.SEARCH_RATE_LIMIT_PER_IP = 0.01
+    settings.SEARCH_RATE_LIMIT_PER_IP_BURST = 1
+    call_command("rebuild_index")
+    user_agent = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+    response = client.get(search_url, {"q": "emploi"}, HTTP_USER_AGENT=user_agent)
+    assert response.status_code == 200
+    with django_assert_num_queries(0):
+        cached = client.get(search_url, {"q": "emploi"}, HTTP_USER_AGENT=user_agent)
+    assert cached.status_code == 200
+    assert cached.content == response.content
+
+    # Other queries are limited.
+    assert client.get(search_url, {"q": "formation"}, HTTP_USER_AGENT=user_agent).status_code == 429
+    # Browsers don't get the crawler responses.
+    assert client.get(search_url, {"q": "emploi"}).status_code == 429
+
+
+@pytest.mark.parametrize(
+    "user_agent,crawler",
+    [
+        ("Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)", True),
+        ("Mozilla/5.0 (compatible; AhrefsBot/7.0; +http://ahrefs.com/robot/)", True),
+        ("facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)", True),
+        ("Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:131.0) Gecko/20100101 Firefox/131.0", False),
+        ("", False),
+    ],
+)
+def test_is_crawler(rf, user_agent, crawler):
+    assert is_crawler(rf.get("/", HTTP_USER_AGENT=user_agent)) is crawler
+
+
+def test_token_bucket_refill():
+    store = MemoryBucketStore(max_buckets=2)
+    assert store.take("a", rate=1, burst=2, now=0) == 0
+    assert store.take("a", rate=1, burst=2, now=0) == 0
+    assert store.take("a", rate=1, burst=2, now=0) == 1
+    assert store.take("a", rate=1, burst=2, now=0.5) == 0.5
+    assert store.take("a", rate=1, burst=2, now=1) == 0
+    # Refilled up to the burst.
+    assert store.take("a", rate=1, burst=2, now=100) == 0
+    assert store.take("a", rate=1, burst=2, now=100) == 0
+    assert store.take("a", rate=1, burst=2, now=100) == 1
+
+    store.take("b", rate=1, burst=2, now=100)
+    store.take("c", rate=1, burst=2, now=100)
+    assert list(store.buckets) == ["b", "c"]
+
+
+def csp_nonce(response):
+    [nonce] = set(re.findall(r"'nonce-([^']+)'", response["Content-Security-Policy"]))
+    return nonce
+
+
+def test_page_cache(client, db, settings):
+    settings.MATOMO_BASE_URL = "https://fake.matomo.url"
+    url = reverse("documentation:category", args=("les-bases-de-liae",))
+    response = client.get(url)
+    assertTemplateUsed(response, "documentation/category.html")
+    assert "HX-Request" in response["Vary"]
+
+    cached = client.get(f"{url}?utm_source=newsletter&mtm_campaign=rentree")
+    assert cached.status_code == 200
+    assert not cached.templates
+    assert cached["Vary"] == response["Vary"]
+    # Filled in for each request.
+    assertContains(cached, '"documentation/les-bases-de-liae?mtm_campaign=rentree\\u0026utm_source=newsletter"')
+    assert "pagecache0" not in cached.content.decode()
+    # The inline scripts are allowed by their hash.
+    assert "'nonce-" not in cached["Content-Security-Policy"]
+    assertNotContains(cached, "nonce=")
+    assert re.search(r'<meta name="csrf-token" content="\w{64}">', cached.content.decode())
+    assert "csrftoken" in cached.cookies
+
+    # Unknown parameters share the page.
+    assert not client.get(url, {"foo": "bar"}).templates
+    # The parameters read by the view have their own pages.
+    response = client.get(url, {"tag": "iae"})
+    assert response.templates
+    assert not client.get(url, {"tag": "iae", "foo": "bar"}).templates
+
+
+def test_page_cache_csp_nonce_mode(client, db, settings):
+    settings.CSP_MODE = "nonce"
+    settings.SECURE_CSP = {"script-src": [CSP.SELF, CSP.NONCE]}
+    url = reverse("documentation:category", args=("les-bases-de-liae",))
+    response = client.get(url)
+    cached = client.get(url)
+    assert not cached.templates
+    # Filled in for each request.
+    assertContains(cached, f'nonce="{csp_nonce(cached)}"')
+    assert csp_nonce(cached) != csp_nonce(response)
+
+
+def test_page_cache_varies_on_htmx(client, db):
+    url = reverse("documentation:category", args=("les-bases-de-liae",))
+    client.get(url)
+    response = client.get(url, HTTP_HX_REQUEST="true")
+    assertTemplateUsed(response, "documentation/partials/cards_list.html")
+    response = client.get(url, HTTP_HX_REQUEST="true")
+    assert not response.templates
+    assertNotContains(response, "<html")
+
+
+def test_page_cache_is_purged_when_the_content_changes(client, db, monkeypatch):
+    url = reverse("pages:home")
+    client.get(url)
+    assert not client.get(url).templates
+    monkeypatch.setattr(page_cache, "content_version", lambda: "new-version")
+    assert client.get(url).templates
+
+
+def test_page_cache_version_changes_with_each_deployment(settings):
+    version = page_cache.content_version()
+    settings.DEPLOY_ID = "0123456789abcdef"
+    page_cache.content_version.cache_clear()
+    try:
+        assert page_cache.content_version() != version
+    finally:
+        page_cache.content_version.cache_clear()
+
+
+def test_page_cache_disabled(client, db, settings):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse("pages:home")
+    client.get(url)
+    assert client.get(url).templates
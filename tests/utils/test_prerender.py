@@ -0,0 +1,57 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from lacommunaute.utils import prerender
+
+
+def test_prerender_pages(client, db, settings, tmp_path):
+    settings.MATOMO_BASE_URL = "https://fake.matomo.url"
+    call_command("prerender_pages", output_dir=tmp_path, jobs=1)
+
+    assert len(list(tmp_path.glob("**/*.html"))) == len(prerender.get_urls())
+    path = tmp_path / "documentation" / "card" / "les-certificats-cléa.html"
+    content = path.read_bytes()
+    assert content == gzip.decompress(path.with_suffix(".html.gz").read_bytes())
+    assert content == brotli.decompress(path.with_suffix(".html.br").read_bytes())
+    assert b'<meta name="csrf-token" content="">' in content
+    assert b'"documentation/card/les-certificats-cl\\u00e9a"</script>' in content
+    assert (tmp_path / "documentation" / "index.html").exists()
+    assert (tmp_path / "partenaires" / "index.html").exists()
+
+    variants = json.loads((tmp_path / prerender.VARIANTS_INDEX).read_text())
+    url = reverse("documentation:category", args=("les-bases-de-liae",)) + "?tag=les-emplois"
+    assert variants[url] == "documentation/les-bases-de-liae/tags/les-emplois.html"
+    assert b"<html" in (tmp_path / variants[url]).read_bytes()
+
+
+def test_prerender_pages_in_parallel(db, tmp_path):
+    stale = tmp_path / "documentation" / "card" / "carte-supprimee.html"
+    stale.parent.mkdir(parents=True)
+    for path in [stale, stale.with_suffix(".html.gz"), tmp_path / "fiche" / "index.html"]:
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"")
+
+    call_command("prerender_pages", output_dir=tmp_path, jobs=2)
+
+    assert len(list(tmp_path.glob("**/*.html"))) == len(prerender.get_urls())
+    assert not stale.exists()
+    assert not stale.with_suffix(".html.gz").exists()
+    assert not (tmp_path / "fiche").exists()
+    assert b"<html" in (tmp_path / "documentation" / "card" / "les-certificats-cléa.html").read_bytes()
+
+
+def test_prerender_pages_mismatch(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(prerender, "render_live", lambda url, host: b"")
+    with pytest.raises(CommandError, match="/documentation/ differs from the page served by Django"):
+        call_command("prerender_pages", output_dir=tmp_path, jobs=1)
+
+
+def test_prerender_pages_nonce_mode(db, settings, tmp_path):
+    settings.CSP_MODE = "nonce"
+    with pytest.raises(CommandError, match="nonce"):
+        call_command("prerender_pages", output_dir=tmp_path, jobs=1)
@@ -0,0 +1,48 @@
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import override_settings
+
+from lacommunaute.utils.templates import warm_up_templates
+
+
+def get_cached_loader():
+    [loader] = engines["django"].engine.template_loaders
+    assert isinstance(loader, CachedLoader)
+    return loader
+
+
+def test_cached_template_loader():
+    loader = get_cached_loader()
+    loader.reset()
+
+    template = engines["django"].get_template("documentation/card.html")
+    assert "documentation/card.html" in loader.get_template_cache
+    assert engines["django"].get_template("documentation/card.html").template is template.template
+
+
+def test_warm_up_templates():
+    loader = get_cached_loader()
+    loader.reset()
+
+    warm_up_templates()
+    for template_name in [
+        "documentation/card.html",
+        "layouts/base.html",
+        "partials/pagination.html",
+        "robots.txt",
+    ]:
+        assert template_name in loader.get_template_cache
+
+
+@override_settings(
+    TEMPLATES=[
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [],
+            "OPTIONS": {"loaders": ["django.template.loaders.filesystem.Loader"]},
+        }
+    ]
+)
+def test_warm_up_templates_without_cached_loader():
+    # Nothing to warm up, and nothing breaks.
+    warm_up_templates()